@@ -1,163 +1,173 @@
 import sys
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QFormLayout, QComboBox,
-    QSpinBox, QDoubleSpinBox, QLineEdit, QPushButton, QLabel, QGridLayout, QGroupBox,QMessageBox
+    QSpinBox, QDoubleSpinBox, QLineEdit, QPushButton, QLabel, QGridLayout, QGroupBox,QMessageBox, QFileDialog
 )
-from PySide6.QtCore import Qt
-import math
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtGui import QImage, QPainter, QPen, QPixmap
+import multiprocessing
+import time
 import numpy as np
-from scipy.stats import (gmean)
-
-
-mu0 = 4*math.pi*1e-7
-eps0 = 8.85*1e-12
-
-# Conductor types and their specifications
-conductor_specs = {
-    "Hawk": {"diameter": 21.793, "GMR": 8.809, "R": 0.132, "I": 659},
-    "Drake": {"diameter": 28.143, "GMR": 11.369, "R": 0.080, "I": 907},
-    "Cardinal": {"diameter": 30.378, "GMR": 12.253, "R": 0.067, "I": 996},
-    "Rail": {"diameter": 29.591, "GMR": 11.765, "R": 0.068, "I": 993},
-    "Pheasant": {"diameter": 35.103, "GMR": 14.204, "R": 0.051, "I": 1187}
-}
-
-# Tower types and their specifications
-tower_types = {
-    "Type-1": {"max_height": 39, "min_height": 23, "max_horizontal": 4, "min_horizontal": 2.2, "voltage": 66000, "max_bundle": 3},
-    "Type-2": {"max_height": 43, "min_height": 38.25, "max_horizontal_side": 11.5, "min_horizontal_side": 9.4, "max_horizontal_center": 8.9, "voltage": 400000, "max_bundle": 4},
-    "Type-3": {"max_height": 48.8, "min_height": 36, "max_horizontal": 5.35, "min_horizontal": 1.8, "voltage": 154000, "max_bundle": 3}
-}
-
-class TransmissionLine:
-    def __init__(self, tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors, length):
-        self.tower_type = tower_type
-        self.num_circuits = num_circuits
-        self.coordinates = coordinates
-        self.num_conductors = num_conductors
-        self.conductor_type = conductor_type
-        self.distance_between_conductors = distance_between_conductors
-        self.length = length
-
-    def calculate_parameters(self):
-        try:
-            # Check if tower type is valid
-            tower_spec = tower_types[self.tower_type]
-            #### ToDO: X-Y COORDINATE RESTRICTIONS OF CORRESPONDING TOWERS IS GOING TO BE DONE ###
-            
-            
-            # Check if number of circuits is valid
-            if self.num_circuits not in [1, 2]:
-                raise ValueError("Invalid number of circuits")            
-            
-            # Check if number of conductors is valid
-            if self.num_conductors > tower_spec["max_bundle"]:
-                raise ValueError(f"Number of conductors exceeds maximum for {self.tower_type} tower")
-
-            # Check if conductor type is valid
-            if self.conductor_type not in conductor_specs:
-                raise ValueError("Invalid conductor type")
-
-            conductor_spec = conductor_specs[self.conductor_type]
-
-            # Calculate line resistance R (Ω)
-            R = conductor_spec["R"] * self.length / self.num_conductors
-            
-            
-            #calc GMD
-            arr_gmd =[]
-            if self.num_circuits == 1: 
-                arr_gmd.append(np.linalg.norm(np.subtract(self.coordinates[0],self.coordinates[1])))
-                arr_gmd.append(np.linalg.norm(np.subtract(self.coordinates[0],self.coordinates[2])))
-                arr_gmd.append(np.linalg.norm(np.subtract(self.coordinates[1],self.coordinates[2]))) #distance between phase b and c 
-                GMD = gmean(arr_gmd)
-            elif self.num_circuits == 2:
-                ab = [np.subtract(self.coordinates[0],self.coordinates[1]),np.subtract(self.coordinates[0],self.coordinates[2]),np.subtract(self.coordinates[-1],self.coordinates[1]),np.subtract(self.coordinates[-1],self.coordinates[-2])]
-                ac = [np.subtract(self.coordinates[0],self.coordinates[2]),np.subtract(self.coordinates[0],self.coordinates[3]),np.subtract(self.coordinates[-1],self.coordinates[2]),np.subtract(self.coordinates[-1],self.coordinates[3])]
-                bc = [np.subtract(self.coordinates[1],self.coordinates[2]),np.subtract(self.coordinates[1],self.coordinates[3]),np.subtract(self.coordinates[-2],self.coordinates[2]),np.subtract(self.coordinates[-2],self.coordinates[3])]
-                #bc is vector list [bc, bc', b'c, b'c']
-                for i in range(4):
-                    ab = [np.linalg.norm(ab[i])]
-                    ac = [np.linalg.norm(ac[i])]
-                    bc = [np.linalg.norm(bc[i])] #iterate over vector list and calculate magnitude of the vectors in list bc
-                    
-                ab_=gmean(ab) 
-                ac_=gmean(ac)
-                bc_=gmean(bc) #gmd of phase b and c
-                GMD = gmean([ab_,ac_,bc_]) #gmd between phases
-            
-            else:
-                raise(ValueError,"unexpected error occurred while calculating GMD")
-            
-
-                
-            
-            
-            #GMR and R_eq calculation
-            arr = []
-            arr_r = []
-            if self.num_circuits==1:
-                if self.num_conductors < 4:
-                    arr = [self.distance_between_conductors for i in range(int(self.num_conductors)-1)] #add d into array n-1 times(n= # of conductors in a bundle)
-                    arr_r = arr #array for r_eq
-                elif self.num_conductors ==4: 
-                    arr = [self.distance_between_conductors for i in range(int(self.num_conductors)-2)] #add d into array n-2 times
-                    arr.append(self.distance_between_conductors*math.sqrt(2)) # add dkök2 into array if 4 cond in a bundle
-                    arr_r = arr
-            elif self.num_circuits ==2: # 2 ct 6 fazlı t.line 
-                arr_gmr_of_each_ph = [math.sqrt(1e-3*int(conductor_spec["GMR"])*np.linalg.norm((self.coordinates[i]-self.coordinates[-i-1]))) for i in range(3)]#list formed by gmr's of each phase i.e. arr_gmr_of_each_ph =[gmr_aa', gmr_bb', gmr_cc'] where gmr_aa'= sqrt(gmr_cond*dis_aa')
-                gmr_2 = gmean(arr_gmr_of_each_ph) # gmr of list: arr_gmr_of_each_ph =[gmr_aa', gmr_bb', gmr_cc'] (for 2 ct)
-                arr_req_oneph = [math.sqrt(int(1e-3*conductor_spec["diameter"])/2*(self.coordinates[i]-self.coordinates[-i])) for i in range(3)] #for R_eq
-                req2 = gmean(arr_req_oneph) #r_eq for 2 ct
-            
-            else:
-                raise(ValueError,"unexpected error occurred while calculating GMR or R_eq")
-            
-            arr.append(1e-3*int(conductor_spec["GMR"])) # add the gmr_conductor into array wihch is arr=[d d..] 
-            GMR = gmean(arr) if (self.num_circuits == 1)  else gmr_2
-            
-            arr_r.append(1e-3*int(conductor_spec["diameter"])/2)
-            R_eq = gmean(arr_r) if (self.num_circuits == 1)  else req2
-        
-
-            ### Calculate L AND R 
-        
-            L = 2e-7 * math.log(GMD / GMR)  # Henries per meter
-            L *= self.length * 1000  # Convert to mH
-            
-            # Calculate line charging capacitance C (µF)
-            C = (2 * math.pi * 8.85419e-12) / (math.log(GMD / R_eq))  # Farads per meter
-            C *= self.length * 1000000  # Convert to uF
-            
-            ### CALCULATE INDUCTANCE L AND C ACCORDING TO TL MODEL (MEDIUM LENGTH,LONG LENGTH ETC.) ???###
-            #L=
-            #C=
-
-            # Calculate line capacity (MVA)
-            voltage = tower_spec["voltage"] if (self.num_circuits == 1)  else 2*tower_spec["voltage"]
-                            
-            current = conductor_spec["I"]*self.num_conductors
-            capacity = current * voltage * math.sqrt(3) / 1000
-
-            return { #DEBUG USING THIS SECTION
-                "R (Ω)": R*1000, 
-                "L (mH)": L*1000, 
-                "C (µF)": C*1000, 
-                "Capacity (MVA)": capacity
-            }
-        except KeyError:
-            return "Invalid tower type"
-        except ValueError as e:
-            return str(e)
-        
-
-
-
-
+from tl_core import TransmissionLine, conductor_specs, tower_types
+from tl_abcd import abcd
+from tl_sweep import run_sweep
+from tl_constraints import check as check_coordinates
+from tl_resistance import skin_factor
+from tl_profile import stage
+from tl_heatmap import colorize, frame as heatmap_frame, metrics as heatmap_metrics
 
 
+class WorkerSignals(QObject):
+    finished = Signal(str, int, object)  # kind, generation, result
+    failed = Signal(str, int, str)
+    done = Signal(object)  # the worker, last thing it emits whatever the outcome
 
 
+class Worker(QRunnable):
+    # runs fn(*args) on the thread pool; the result is tagged with the kind and generation it was started for
+    # so the window can drop results of calculations that were superseded while running
+    def __init__(self, kind, generation, fn, *args, pass_cancel=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.kind = kind
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.pass_cancel = pass_cancel
+        self.cancelled = False
+        self.signals = WorkerSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
+
+    def run(self):
+        try:
+            self.execute()
+        finally:
+            self.signals.done.emit(self)
 
+    def execute(self):
+        if self.cancelled:
+            return
+        try:
+            if self.pass_cancel:
+                # long jobs poll is_cancelled between chunks and stop early
+                result = self.fn(*self.args, cancelled=self.is_cancelled)
+            else:
+                result = self.fn(*self.args)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(self.kind, self.generation, str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.kind, self.generation, result)
+
+
+def calculate_design(design):
+    return TransmissionLine(*design).calculate_parameters()
+
+
+def scan_frequencies(result, length, conductor_type):
+    # |A| of the long line model from 50 Hz to 5 kHz for lengths up to the line length,
+    # R follows the skin effect of the conductor over the frequencies
+    R, L, C = (result[key] / length for key in ("R (Ω)", "L (mH)", "C (µF)"))
+    frequencies = np.linspace(50, 5000, 1000)
+    lengths = np.linspace(length / 200, length, 200)
+    start = time.perf_counter()
+    R = R * skin_factor(conductor_type, frequency=frequencies)
+    A, _, _, _ = abcd(R[:, None], L, C, frequencies[:, None], lengths[None, :])
+    elapsed = time.perf_counter() - start
+    resonance = frequencies[np.abs(A[:, -1]).argmin()]
+    return f"Frequency scan of {A.size} points in {elapsed:.2f} s: first resonance of the {length} km line near {resonance:.0f} Hz"
+
+
+def sweep_tower(tower_type, output, spacing, length, cancelled=None):
+    start = time.perf_counter()
+    # runs on a Qt worker thread, forking a threaded process is unsafe so the pool is spawned
+    written = run_sweep(tower_type, output, spacing=spacing, length=length, cancelled=cancelled,
+                        mp_context=multiprocessing.get_context("spawn"))
+    return f"Sweep of {tower_type}: {written} designs written to {output} in {time.perf_counter() - start:.1f} s"
+
+
+class HeatmapPanel(QGroupBox):
+    # L, C or MVA while one phase position or the bundle is varied; the frame's tiles are painted into one
+    # image and a tile is only repainted when its values or the colour scale changed
+    def __init__(self, size=256):
+        super().__init__("Sensitivity Heatmap")
+        self.size = size
+        layout = QFormLayout(self)
+
+        self.mode = QComboBox()
+        self.mode.addItems([f"Phase {i+1} position (x, y)" for i in range(6)] + ["Bundle spacing x conductor type"])
+        layout.addRow("Vary:", self.mode)
+
+        self.metric = QComboBox()
+        self.metric.addItems(heatmap_metrics)
+        self.metric.currentIndexChanged.connect(self.repaint_tiles)
+        layout.addRow("Show:", self.metric)
+
+        self.image_label = QLabel()
+        self.image_label.setFixedSize(size, size)
+        layout.addRow(self.image_label)
+        self.range_label = QLabel("")
+        layout.addRow(self.range_label)
+
+        self.image = QImage()
+        self.frame = None
+        self.painted = {}  # (row, column) -> tile key and colour scale it was painted with
+
+    def mode_value(self):
+        index = self.mode.currentIndex()
+        return "bundle" if index == 6 else index
+
+    def show_frame(self, frame):
+        self.frame = frame
+        self.repaint_tiles()
+
+    def show_message(self, message):
+        self.frame = None
+        self.image_label.clear()
+        self.range_label.setText(message)
+
+    def repaint_tiles(self, *args):
+        if self.frame is None:
+            return
+        metric = self.metric.currentText()
+        xs, ys, tiles = self.frame["xs"], self.frame["ys"], self.frame["tiles"]
+        values = np.concatenate([tile[metric].ravel() for _, _, _, tile in tiles])
+        values = values[np.isfinite(values)]
+        lo, hi = (values.min(), values.max()) if values.size else (0.0, 1.0)
+
+        width, height = len(xs), len(ys)
+        if self.image.width() != width or self.image.height() != height:
+            self.image = QImage(width, height, QImage.Format_RGB888)
+            self.painted = {}
+        painter = QPainter(self.image)
+        for row, column, key, tile in tiles:
+            state = (key, metric, lo, hi)
+            if self.painted.get((row, column)) == state:
+                continue
+            rgb = np.ascontiguousarray(colorize(tile[metric], lo, hi)[::-1])  # y grows upwards
+            h, w = rgb.shape[:2]
+            painter.drawImage(column, height - row - h, QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888))
+            self.painted[(row, column)] = state
+        painter.end()
+
+        # the marker is drawn on the scaled copy so moving it never touches the tiles
+        pixmap = QPixmap.fromImage(self.image.scaled(self.size, self.size))
+        x, y = self.frame["marker"]
+        px = int(((x - xs[0]) / (xs[-1] - xs[0]) * (width - 1) + 0.5) / width * self.size)
+        py = int(self.size - ((y - ys[0]) / (ys[-1] - ys[0]) * (height - 1) + 0.5) / height * self.size)
+        painter = QPainter(pixmap)
+        painter.setPen(QPen(Qt.red, 2))
+        painter.drawLine(px - 6, py, px + 6, py)
+        painter.drawLine(px, py - 6, px, py + 6)
+        painter.end()
+        self.image_label.setPixmap(pixmap)
+        self.range_label.setText(f"{metric}: {lo:.4g} (purple) to {hi:.4g} (yellow)")
 
 
 class TransmissionLineCalculator(QMainWindow):
@@ -172,9 +182,28 @@ class TransmissionLineCalculator(QMainWindow):
 
         self.layout = QVBoxLayout(self.main_widget)
 
+        # calculations run on the thread pool, the newest one of each kind wins
+        self.thread_pool = QThreadPool.globalInstance()
+        self.workers = {}
+        self.running = set()  # every started worker until its run() returned, superseded ones included
+        self.generations = {}
+        self.live_calculation = False
+        self.last_result = None
+
+        # recompute shortly after the user stops editing
+        self.recompute_timer = QTimer(self)
+        self.recompute_timer.setSingleShot(True)
+        self.recompute_timer.setInterval(200)
+        self.recompute_timer.timeout.connect(lambda: self.start_calculation(live=True))
+
         self.create_inputs()
         self.create_buttons()
 
+        self.heatmap = HeatmapPanel()
+        self.layout.addWidget(self.heatmap, alignment=Qt.AlignCenter)
+
+        self.connect_live_recompute()
+
     def create_inputs(self):
         self.form_layout = QFormLayout()
 
@@ -235,64 +264,126 @@ class TransmissionLineCalculator(QMainWindow):
         self.calculate_button.clicked.connect(self.calculate_parameters)
         self.layout.addWidget(self.calculate_button, alignment=Qt.AlignCenter)
 
+        self.scan_button = QPushButton("Frequency Scan")
+        self.scan_button.clicked.connect(self.start_frequency_scan)
+        self.layout.addWidget(self.scan_button, alignment=Qt.AlignCenter)
+
+        self.sweep_button = QPushButton("Sweep Tower Geometry")
+        self.sweep_button.clicked.connect(self.start_sweep)
+        self.layout.addWidget(self.sweep_button, alignment=Qt.AlignCenter)
+
         self.result_label = QLabel("")
         self.layout.addWidget(self.result_label, alignment=Qt.AlignCenter)
 
-    def calculate_parameters(self):
-        # Extract values from inputs
+        self.status_label = QLabel("")
+        self.layout.addWidget(self.status_label, alignment=Qt.AlignCenter)
+
+    def connect_live_recompute(self):
+        self.tower_type.currentIndexChanged.connect(self.schedule_recompute)
+        self.num_circuits.valueChanged.connect(self.schedule_recompute)
+        self.num_conductors.valueChanged.connect(self.schedule_recompute)
+        self.bundle_distance.valueChanged.connect(self.schedule_recompute)
+        self.conductor_type.currentIndexChanged.connect(self.schedule_recompute)
+        self.transmission_length.valueChanged.connect(self.schedule_recompute)
+        for coord in self.phase_coords.values():
+            coord.textChanged.connect(self.schedule_recompute)
+        self.heatmap.mode.currentIndexChanged.connect(self.schedule_recompute)
+
+    def schedule_recompute(self, *args):
+        self.recompute_timer.start()
+
+    def start_worker(self, kind, fn, *args, pass_cancel=False):
+        # cancel the previous job of this kind: drop it if still queued, ignore its result if running
+        previous = self.workers.get(kind)
+        if previous is not None:
+            previous.cancel()
+            if self.thread_pool.tryTake(previous):
+                self.running.discard(previous)  # never ran, so never signals done
+        self.generations[kind] = self.generations.get(kind, 0) + 1
+        worker = Worker(kind, self.generations[kind], fn, *args, pass_cancel=pass_cancel)
+        worker.signals.finished.connect(self.worker_finished)
+        worker.signals.failed.connect(self.worker_failed)
+        worker.signals.done.connect(self.worker_done)
+        self.workers[kind] = worker
+        self.running.add(worker)
+        self.thread_pool.start(worker)
+        return worker
+
+    def worker_finished(self, kind, generation, result):
+        if generation != self.generations.get(kind):
+            return  # stale result
+        self.workers.pop(kind, None)
+        with stage(f"gui.{kind}"):
+            if kind == "calculate":
+                self.show_result(result)
+            elif kind == "heatmap":
+                self.heatmap.show_frame(result)
+            else:
+                self.status_label.setText(str(result))
+
+    def worker_done(self, worker):
+        # the pool is finished with it (autoDelete is off), the last Python reference may go now
+        self.running.discard(worker)
+
+    def worker_failed(self, kind, generation, message):
+        if generation != self.generations.get(kind):
+            return
+        self.workers.pop(kind, None)
+        if kind == "heatmap":
+            self.heatmap.show_message(message)
+            return
+        self.status_label.setText("")
+        self.show_error(message)
+
+    def read_inputs(self):
+        # Extract values from inputs, raises ValueError for invalid input
         tower_type = self.tower_type.currentText()
         num_circuits = self.num_circuits.value()
         phase_coords = {key: value.text() for key, value in self.phase_coords.items()}
-        # convert phase coordinates to two dimensional list
+        # convert phase coordinates to two dimensional list, the second circuit only counts for two circuits
+        phase_coords = [[float(coord) for coord in value.split(",")] for key, value in phase_coords.items()
+                        if num_circuits == 2 or "Circuit 1" in key]
+        if any(len(coord) != 2 for coord in phase_coords):
+            raise ValueError("Phase coordinates must be given as x, y")
+        check_coordinates(tower_type, num_circuits, phase_coords)
+
+        num_conductors = self.num_conductors.value()
+        bundle_distance = self.bundle_distance.value()
+        conductor_type = self.conductor_type.currentText()
+        transmission_length = self.transmission_length.value()
+        return tower_type, num_circuits, phase_coords, num_conductors, conductor_type, bundle_distance, transmission_length
+
+    def calculate_parameters(self):
+        self.recompute_timer.stop()
+        self.start_calculation(live=False)
+
+    def start_calculation(self, live=False):
         try:
-            if num_circuits == 1:
-                # remove the second circuit's coordinates
-                phase_coords = {key: value for key, value in phase_coords.items() if "Circuit 1" in key}
-                phase_coords = [[float(coord) for coord in value.split(",")] for value in phase_coords.values()]
-                if tower_type=="Type-1" and (not (23 < phase_coords[0][1] < 39)) and (not (23 < phase_coords[1][1] < 39)) and (not (23 < phase_coords[2][1] < 39)):
-                    raise ValueError("y coordinates of tower must be in range between 23m and 39m")
-                if tower_type=="Type-1" and (not (2.2 < abs(phase_coords[0][0]) < 4)) and (not (2.2 < abs(phase_coords[1][0]) < 4)) and (not (2.2 < abs(phase_coords[2][0]) < 4)):
-                    raise ValueError("x  coordinates of tower must far away at most 4m and at least 2.2m ")    
-
-                if tower_type=="Type-2" and (not (38.25 < phase_coords[0][1] < 43)) and (not (38.25 < phase_coords[1][1] < 43)) and (not (38.25 < phase_coords[2][1] < 43)):
-                    raise ValueError("y coordinates of tower must be in range between 38.25m and 43m")
-                if tower_type=="Type-2" and (not (9.4 < abs(phase_coords[0][0]) < 11.5)) and (not (9.4 < abs(phase_coords[2][0]) < 11.5)):
-                    raise ValueError("x coordinates of side phases must far away at most 11.5m and at least 9.4m ") 
-                if tower_type=="Type-2" and (not (-8.9 < phase_coords[1][0] < 8.9)):
-                    raise ValueError("x coordinates of center phase must far away at most 8.9m")
-
-
-            elif num_circuits == 2:
-                phase_coords = [[float(coord) for coord in value.split(",")] for value in phase_coords.values()]
-                if tower_type=="Type-3" and (not (36 < phase_coords[:][1] < 48.8)):
-                    raise ValueError("y coordinates of tower must be in range between 36m and 48.8m")
-                if tower_type=="Type-3" and (not (1.8 < abs(phase_coords[:][0]) < 5.35)):
-                    raise ValueError("x coordinates of side phases must far away at most 1.8m and at least 5.35m ") 
-
-            num_conductors = self.num_conductors.value()
-            bundle_distance = self.bundle_distance.value()
-            conductor_type = self.conductor_type.currentText()
-            transmission_length = self.transmission_length.value()
-
-
-
-        except ValueError as e:
+            design = self.read_inputs()
+        except (ValueError, IndexError, TypeError) as e:
+            if live:
+                # half typed input while editing, wait for the next change
+                self.status_label.setText(str(e))
+                return
             print("Error caught in calculate_parameters:", e)  # Print the caught error
             self.show_error(str(e))  # Show the error in a QMessageBox
             return  # Exit the function if an error is caught
 
-        # Placeholder for actual calculation logic
-        # In a real application, perform the necessary calculations here
+        tower_type, num_circuits, phase_coords, num_conductors, conductor_type, bundle_distance, transmission_length = design
         result = f"Calculating with:\nTower Type: {tower_type}\nNumber of Circuits: {num_circuits}\n"
         result += f"Phase Coordinates: {phase_coords}\nNumber of Conductors: {num_conductors}\n"
         result += f"Bundle Distance: {bundle_distance} m\nConductor Type: {conductor_type}\n"
         result += f"Transmission Length: {transmission_length} km"
 
         self.parameter_input_label.setText(result)
+        self.status_label.setText("")
+        self.live_calculation = live
+        self.start_worker("calculate", calculate_design, design)
+        self.start_worker("heatmap", heatmap_frame, design, self.heatmap.mode_value())
 
-        line = TransmissionLine(tower_type, num_circuits, phase_coords, num_conductors, conductor_type, bundle_distance, transmission_length)
-        result = line.calculate_parameters()
+    def show_result(self, result):
         # if result is a dictionary then display the results as a table
+        self.last_result = result
         if isinstance(result, dict):
             result_str = ""
             for key, value in result.items():
@@ -300,11 +391,30 @@ class TransmissionLineCalculator(QMainWindow):
             # make it bold and bigger
             self.result_label.setStyleSheet("font-weight: bold; font-size: 16px;")
             self.result_label.setText(result_str)
+        elif isinstance(result, str) and self.live_calculation:
+            self.status_label.setText(result)
         elif isinstance(result, str):
             QMessageBox.critical(self, "Error", result)
         else:    
             self.result_label.setText(str(result))
-            
+
+    def start_frequency_scan(self):
+        result = self.last_result
+        if not isinstance(result, dict):
+            self.show_error("Calculate the line parameters before scanning frequencies")
+            return
+        self.status_label.setText("Scanning frequencies...")
+        self.start_worker("scan", scan_frequencies, result, self.transmission_length.value(), self.conductor_type.currentText())
+
+    def start_sweep(self):
+        output, _ = QFileDialog.getSaveFileName(self, "Save Sweep Results", "sweep.csv", "CSV files (*.csv)")
+        if not output:
+            return
+        tower_type = self.tower_type.currentText()
+        self.status_label.setText(f"Sweeping {tower_type}...")
+        self.start_worker("sweep", sweep_tower, tower_type, output, self.bundle_distance.value(),
+                          self.transmission_length.value(), pass_cancel=True)
+
     def show_error(self, message):
         msg_box = QMessageBox()
         msg_box.setIcon(QMessageBox.Critical)
@@ -0,0 +1,59 @@
+import math
+import numpy as np
+
+
+# line length limits (km) of the short and medium (nominal pi) models used by model="auto"
+short_line_limit = 80
+medium_line_limit = 250
+
+
+def per_km_series_shunt(R, L, C, frequency, G=0.0):
+    # z (Ω/km) and y (S/km) from R (Ω/km), L (mH/km), C (µF/km)
+    omega = 2 * math.pi * np.asarray(frequency, dtype=float)
+    z = R + 1j * omega * L * 1e-3
+    y = G + 1j * omega * C * 1e-6
+    return z, y
+
+
+def abcd(R, L, C, frequency, length, model="long", G=0.0):
+    # ABCD parameters of the line for arrays of per km constants, frequencies (Hz) and lengths (km),
+    # all arguments broadcast against each other. Returns complex arrays A, B, C, D.
+    z, y = per_km_series_shunt(R, L, C, frequency, G)
+    length = np.asarray(length, dtype=float)
+    Z = z * length
+    Y = y * length
+    if model == "auto":
+        short = abcd(R, L, C, frequency, length, "short", G)
+        medium = abcd(R, L, C, frequency, length, "nominal_pi", G)
+        long_line = abcd(R, L, C, frequency, length, "long", G)
+        return tuple(np.where(length < short_line_limit, s, np.where(length < medium_line_limit, m, l))
+                     for s, m, l in zip(short, medium, long_line))
+    if model == "short":
+        one = np.ones(np.broadcast(Z, Y).shape, dtype=complex)
+        return one, Z * one, 0 * one, one
+    if model == "nominal_pi":
+        A = 1 + Z * Y / 2
+        return A, Z + 0 * Y, Y * (1 + Z * Y / 4), A
+    if model == "long":
+        gamma_l = np.sqrt(Z * Y)
+        Zc = np.sqrt(z / y)
+        cosh, sinh = np.cosh(gamma_l), np.sinh(gamma_l)
+        return cosh, Zc * sinh, sinh / Zc, cosh
+    raise ValueError(f"Unknown line model {model}")
+
+
+def equivalent_pi(R, L, C, frequency, length, G=0.0):
+    # series impedance Z' (Ω) and total shunt admittance Y' (S) of the exact long line pi
+    z, y = per_km_series_shunt(R, L, C, frequency, G)
+    gamma_l = np.sqrt(z * y) * np.asarray(length, dtype=float)
+    Zc = np.sqrt(z / y)
+    return Zc * np.sinh(gamma_l), 2 * np.tanh(gamma_l / 2) / Zc
+
+
+def frequency_sweep(R, L, C, frequencies, lengths, model="long", G=0.0):
+    # every frequency against every length in one call: per km constants of shape S give
+    # ABCD arrays of shape S + (len(frequencies), len(lengths))
+    R, L, C = (np.asarray(v, dtype=float)[..., None, None] for v in (R, L, C))
+    frequencies = np.asarray(frequencies, dtype=float)[:, None]
+    lengths = np.asarray(lengths, dtype=float)[None, :]
+    return abcd(R, L, C, frequencies, lengths, model, G)
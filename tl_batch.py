@@ -0,0 +1,171 @@
+import math
+import numpy as np
+
+from tl_specs import conductors, eps0, towers
+from tl_bundle import bundle_log_distances
+from tl_constraints import check, valid
+from tl_profile import stage
+
+
+# Error codes of the batch engine, index into error_messages
+ERR_OK = 0
+ERR_TOWER = 1
+ERR_CIRCUITS = 2
+ERR_BUNDLE = 3
+ERR_CONDUCTOR = 4
+ERR_COORDINATES = 5
+ERR_BUNDLE_MIN = 6
+ERR_SPACING = 7
+ERR_SPAN = 8  # sag model only, see tl_sag.sagged_parameters
+error_messages = (
+    "",
+    "Invalid tower type",
+    "Invalid number of circuits",
+    "Number of conductors exceeds maximum for tower",
+    "Invalid conductor type",
+    "Phase coordinates outside the tower limits",
+    "Number of conductors must be at least 1",
+    "Distance between conductors must be positive for a bundle",
+    "Span must be positive",
+)
+
+# phase index pairs, circuit 2 phases are coordinates[3:6] in the same a, b, c order
+single_pairs = ((0, 1), (0, 2), (1, 2))
+double_pairs = (
+    ((0, 1), (0, 4), (3, 1), (3, 4)),  # ab, ab', a'b, a'b'
+    ((0, 2), (0, 5), (3, 2), (3, 5)),  # ac, ac', a'c, a'c'
+    ((1, 2), (1, 5), (4, 2), (4, 5)),  # bc, bc', b'c, b'c'
+)
+same_phase_pairs = ((0, 3), (1, 4), (2, 5))  # aa', bb', cc'
+
+
+def log_gmd(log_d, num_circuits):
+    # log-space geometric mean distance between phases
+    out = np.empty(log_d.shape[0])
+    one = num_circuits == 1
+    out[one] = np.mean([log_d[one, i, j] for i, j in single_pairs], axis=0)
+    two = ~one
+    if two.any():
+        phase_gmd = [np.mean([log_d[two, i, j] for i, j in pairs], axis=0) for pairs in double_pairs]
+        out[two] = np.mean(phase_gmd, axis=0)
+    return out
+
+
+def log_phase_radius(log_bundle, log_d, num_circuits):
+    # double circuit: each phase is the parallel pair, gmr_aa' = sqrt(gmr_bundle * d_aa')
+    out = log_bundle.copy()
+    two = num_circuits == 2
+    if two.any():
+        same = np.mean([log_d[two, i, j] for i, j in same_phase_pairs], axis=0)
+        out[two] = 0.5 * (log_bundle[two] + same)
+    return out
+
+
+def line_constants(coordinates, num_circuits, num_conductors, distance_between_conductors, gmr, diameter, resistance, current, voltage):
+    # per km constants of N designs given numeric columns
+    # coordinates (N, 3 or 6, 2) in m, gmr and diameter in mm, resistance in Ω/km, current in A, voltage in V
+    with stage("batch.bundle", len(coordinates)):
+        log_d, log_bundle = bundle_log_distances(coordinates, num_conductors, distance_between_conductors)
+    return constants_from_log_distances(log_d, log_bundle, num_circuits, num_conductors, gmr, diameter, resistance, current, voltage)
+
+
+def constants_from_log_distances(log_d, log_bundle, num_circuits, num_conductors, gmr, diameter, resistance, current, voltage):
+    # same as line_constants from the (N, P, P) log GMD matrix between phase bundles
+    # and the (N,) within-bundle part of tl_bundle.bundle_log_distances
+    num_circuits = np.asarray(num_circuits)
+    num_conductors = np.asarray(num_conductors)
+    n_rows = len(log_d)
+    with stage("batch.gmd", n_rows):
+        gmd = log_gmd(log_d, num_circuits)
+
+    with stage("batch.gmr", n_rows):
+        log_gmr = log_phase_radius(np.log(1e-3 * gmr) / num_conductors + log_bundle, log_d, num_circuits)
+        log_req = log_phase_radius(np.log(1e-3 * diameter / 2) / num_conductors + log_bundle, log_d, num_circuits)
+
+    with stage("batch.lc", n_rows), np.errstate(divide="ignore"):
+        # both circuits in parallel are one equivalent phase
+        R = resistance / (num_conductors * num_circuits)  # Ω/km
+        L = 2e-7 * (gmd - log_gmr) * 1e6  # H/m -> mH/km
+        C = 2 * math.pi * eps0 / (gmd - log_req) * 1e9  # F/m -> µF/km
+    with stage("batch.capacity", n_rows):
+        capacity = num_circuits * math.sqrt(3) * voltage * current * num_conductors / 1e6  # MVA
+    return R, L, C, capacity
+
+
+def lookup(names, table, field):
+    # map a column of names onto a numeric column of a catalog table or spec dict, NaN where unknown
+    if hasattr(table, "column"):
+        return table.column(names, field)
+    names = np.asarray(names)
+    keys, inverse = np.unique(names, return_inverse=True)
+    values = np.array([table[k][field] if k in table else np.nan for k in keys], dtype=float)
+    return values[inverse.reshape(names.shape)]
+
+
+def design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors):
+    # error code column of N designs, same check order as the scalar model, first failing check wins
+    n_rows = len(coordinates)
+    error = np.full(n_rows, ERR_OK, dtype=np.int8)
+    error[~valid(tower_type, num_circuits, coordinates)] = ERR_COORDINATES
+    error[np.isnan(lookup(conductor_type, conductors, "GMR"))] = ERR_CONDUCTOR
+    # sub-conductors of a bundle must not coincide, a single conductor ignores the spacing
+    error[(num_conductors > 1) & ~(np.asarray(distance_between_conductors) > 0)] = ERR_SPACING
+    max_bundle = lookup(tower_type, towers, "max_bundle")
+    error[num_conductors > max_bundle] = ERR_BUNDLE
+    error[num_conductors < 1] = ERR_BUNDLE_MIN
+    error[(num_circuits != 1) & (num_circuits != 2)] = ERR_CIRCUITS
+    error[np.isnan(lookup(tower_type, towers, "voltage"))] = ERR_TOWER
+    if coordinates.shape[1] < 6:
+        error[(error == ERR_OK) & (num_circuits == 2)] = ERR_CIRCUITS
+    return error
+
+
+def error_message(code, row):
+    # message of one design's error code as the scalar model words it, row starts with (tower_type,
+    # num_circuits, coordinates) like the TransmissionLine arguments and tl_cache.design_key
+    if code == ERR_BUNDLE:
+        return f"Number of conductors exceeds maximum for {row[0]} tower"
+    if code == ERR_COORDINATES:
+        try:
+            check(row[0], row[1], row[2])
+        except ValueError as e:
+            return str(e)
+    return error_messages[code]
+
+
+def calculate_parameters_batch(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors, length):
+    # Batch version of TransmissionLine.calculate_parameters, every argument is a column of N designs
+    # (scalars are broadcast). Returns arrays with the same keys plus an "error" code column.
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows = coordinates.shape[0]
+    column = lambda v, dtype=None: np.broadcast_to(np.asarray(v, dtype=dtype), (n_rows,))
+    tower_type = column(tower_type)
+    conductor_type = column(conductor_type)
+    num_circuits = column(num_circuits, int)
+    num_conductors = column(num_conductors, int)
+    distance_between_conductors = column(distance_between_conductors, float)
+    length = column(length, float)
+
+    with stage("batch.lookup", n_rows):
+        voltage = lookup(tower_type, towers, "voltage")
+        gmr = lookup(conductor_type, conductors, "GMR")
+        diameter = lookup(conductor_type, conductors, "diameter")
+        resistance = lookup(conductor_type, conductors, "R")
+        current = lookup(conductor_type, conductors, "I")
+
+    with stage("batch.validation", n_rows):
+        error = design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors)
+    ok = error == ERR_OK
+    R, L, C, capacity = (np.full(n_rows, np.nan) for _ in range(4))
+    if ok.any():
+        R[ok], L[ok], C[ok], capacity[ok] = line_constants(
+            coordinates[ok], num_circuits[ok], num_conductors[ok], distance_between_conductors[ok],
+            gmr[ok], diameter[ok], resistance[ok], current[ok], voltage[ok])
+
+    return {
+        "R (Ω)": R * length,
+        "L (mH)": L * length,
+        "C (µF)": C * length,
+        "Capacity (MVA)": capacity,
+        "error": error,
+    }
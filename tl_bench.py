@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from tl_specs import conductor_specs, conductors, tower_types, towers
+from tl_batch import calculate_parameters_batch, error_message, line_constants, lookup
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+golden_path = os.path.join(here, "tl_golden.json")
+result_keys = ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)")
+
+# tower used for each circuit count and a representative layout of it
+bench_towers = {1: "Type-2", 2: "Type-3"}
+layouts = {
+    "Type-1": [[-3.0, 30.0], [3.0, 33.0], [-3.0, 36.0]],
+    "Type-2": [[-10.0, 40.0], [0.0, 40.0], [10.0, 40.0]],
+    "Type-3": [[-3.0, 40.0], [-3.5, 44.0], [-3.0, 48.0], [3.0, 40.0], [3.5, 44.0], [3.0, 48.0]],
+}
+
+
+def golden_cases():
+    # every tower with every conductor and bundle size on its representative layout
+    cases = []
+    for tower_type, coordinates in layouts.items():
+        for conductor_type in conductor_specs:
+            for num_conductors in range(1, tower_types[tower_type]["max_bundle"] + 1):
+                cases.append({"tower_type": tower_type, "num_circuits": len(coordinates) // 3, "coordinates": coordinates,
+                              "num_conductors": num_conductors, "conductor_type": conductor_type,
+                              "distance_between_conductors": 0.4, "length": 100.0})
+    # invalid designs, their output is the error message
+    for spacing in (0.0, -0.4):
+        cases.append({"tower_type": "Type-1", "num_circuits": 1, "coordinates": layouts["Type-1"], "num_conductors": 2,
+                      "conductor_type": "Hawk", "distance_between_conductors": spacing, "length": 100.0})
+    return cases
+
+
+def case_args(case):
+    return (case["tower_type"], case["num_circuits"], case["coordinates"], case["num_conductors"],
+            case["conductor_type"], case["distance_between_conductors"], case["length"])
+
+
+# every engine maps a design case onto a result dict (or an error string like the scalar model)
+
+def batch_engine(case):
+    result = calculate_parameters_batch(*[[v] for v in case_args(case)])
+    if result["error"][0]:
+        return error_message(result["error"][0], case_args(case))
+    return {key: float(result[key][0]) for key in result_keys}
+
+
+def cache_engine(case):
+    from tl_cache import cached_parameters
+    return cached_parameters(*case_args(case))
+
+
+def scalar_engine(module_name):
+    def engine(case):
+        module = __import__(module_name)
+        return module.TransmissionLine(*case_args(case)).calculate_parameters()
+    return engine
+
+
+def engines():
+    found = {"tl_batch": batch_engine, "tl_cache": cache_engine, "tl_main": scalar_engine("tl_main")}
+    try:
+        import EE374_group_17  # noqa: F401 needs PySide6
+        found["EE374_group_17"] = scalar_engine("EE374_group_17")
+    except ImportError:
+        pass
+    return found
+
+
+# The "baseline" section of tl_golden.json holds outputs of the GUI's TransmissionLine as it was before the
+# refactor, recorded once since that code is gone. It reported R in mΩ and capacity in kVA under the Ω and
+# MVA keys and truncated GMR and diameter to whole mm; with that undone R and capacity must match the batch
+# engine exactly and L up to the sub-conductor GMD of bundles (exact for single conductors). Its C is not
+# compared, the old R_eq also averaged in the GMR.
+baseline_checks = {"R (Ω)": (1e3, 1e-9), "L (mH)": (1.0, 1e-4), "Capacity (MVA)": (1e3, 1e-9)}  # key: (unit factor, rtol)
+
+
+def baseline_reference(case):
+    # batch engine constants with the baseline's whole mm GMR and diameter
+    conductor_type, tower_type = [case["conductor_type"]], [case["tower_type"]]
+    R, L, _, capacity = line_constants(
+        np.array([case["coordinates"]], dtype=float), np.array([case["num_circuits"]]), np.array([case["num_conductors"]]),
+        np.array([case["distance_between_conductors"]]), np.floor(lookup(conductor_type, conductors, "GMR")),
+        np.floor(lookup(conductor_type, conductors, "diameter")), lookup(conductor_type, conductors, "R"),
+        lookup(conductor_type, conductors, "I"), lookup(tower_type, towers, "voltage"))
+    return {"R (Ω)": R[0] * case["length"], "L (mH)": L[0] * case["length"], "Capacity (MVA)": capacity[0]}
+
+
+def check_baseline(cases):
+    mismatches = []
+    for case in cases:
+        result = baseline_reference(case["input"])
+        if any(not np.isclose(result[key] * scale, case["output"][key], rtol=rtol, atol=0) for key, (scale, rtol) in baseline_checks.items()):
+            mismatches.append({"input": case["input"], "expected": case["output"], "got": result})
+    return {"cases": len(cases), "mismatches": len(mismatches), "first_mismatch": mismatches[0] if mismatches else None}
+
+
+def check_golden(golden, rtol=1e-9):
+    # compare every engine against the stored golden outputs, returns {engine: report}
+    reports = {}
+    for name, engine in engines().items():
+        mismatches = []
+        for case in golden["cases"]:
+            try:
+                result = engine(case["input"])
+            except Exception as e:
+                result = f"{type(e).__name__}: {e}"
+            expected = case["output"]
+            if isinstance(expected, str) or isinstance(result, str):
+                if result != expected:
+                    mismatches.append({"input": case["input"], "expected": expected, "got": result})
+            elif any(not np.isclose(result[key], expected[key], rtol=rtol, atol=0) for key in result_keys):
+                mismatches.append({"input": case["input"], "expected": expected, "got": result})
+        reports[name] = {"cases": len(golden["cases"]), "mismatches": len(mismatches), "first_mismatch": mismatches[0] if mismatches else None}
+    if "baseline" in golden:
+        reports["baseline"] = check_baseline(golden["baseline"]["cases"])
+    return reports
+
+
+def write_golden(path=golden_path):
+    # the recorded baseline outputs cannot be regenerated and are kept as they are
+    golden = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            golden = json.load(f)
+    golden.update(engine="tl_batch", cases=[{"input": case, "output": batch_engine(case)} for case in golden_cases()])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=1, ensure_ascii=False)
+    return len(golden["cases"])
+
+
+def timed(fn, repeat=5, number=1):
+    # best time per call over `repeat` runs of `number` calls
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def bench_latency(number=2000):
+    case = {"tower_type": "Type-1", "num_circuits": 1, "coordinates": layouts["Type-1"], "num_conductors": 2,
+            "conductor_type": "Hawk", "distance_between_conductors": 0.4, "length": 100.0}
+    results = {}
+    for name, engine in engines().items():
+        results[f"latency/{name}"] = {"value": timed(lambda: engine(case), number=number) * 1e6, "unit": "us"}
+    return results
+
+
+def bench_throughput(rows=100000):
+    results = {}
+    rng = np.random.default_rng(0)
+    for num_circuits, tower_type in bench_towers.items():
+        base = np.array(layouts[tower_type])
+        coordinates = base + rng.uniform(-0.5, 0.5, size=(rows,) + base.shape)
+        for num_conductors in range(1, tower_types[tower_type]["max_bundle"] + 1):
+            seconds = timed(lambda: calculate_parameters_batch(tower_type, num_circuits, coordinates, num_conductors, "Drake", 0.4, 100.0), repeat=3)
+            results[f"throughput/circuits={num_circuits}/bundle={num_conductors}"] = {"value": rows / seconds, "unit": "rows/s"}
+    return results
+
+
+def bench_rating(steps=52560, lines=100):
+    # dynamic line rating of a year of 10 minute weather for many lines
+    from tl_rating import ampacity
+    rng = np.random.default_rng(0)
+    weather = (rng.uniform(-5, 40, steps), rng.uniform(0, 10, steps), rng.uniform(0, 360, steps), rng.uniform(0, 1000, steps))
+    names = np.resize(list(conductor_specs), lines)
+    seconds = timed(lambda: ampacity(names, *weather), repeat=3)
+    return {f"rating/steps={steps}/lines={lines}": {"value": steps * lines / seconds, "unit": "rows/s"}}
+
+
+heavy_modules = ("scipy", "PySide6", "pandas", "pyarrow")
+
+
+def bench_import(modules=("tl_core", "tl_main", "tl_batch", "EE374_group_17"), repeat=5):
+    # cold import in a fresh interpreter, median of `repeat` runs, with the heavy packages it pulled in
+    results = {}
+    for module in modules:
+        code = (f"import sys, time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t); "
+                f"print(*sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy_modules!r})))")
+        times = []
+        for _ in range(repeat):
+            run = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+            if run.returncode != 0:
+                break
+            seconds, loaded = run.stdout.splitlines()[-2:]
+            times.append(float(seconds))
+        if times:
+            results[f"import/{module}"] = {"value": statistics.median(times) * 1e3, "unit": "ms", "loads": loaded.split()}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # regressions beyond tolerance against a stored run, higher is better for rates and worse for times
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline.get("results", {}):
+            continue
+        old = baseline["results"][name]["value"]
+        new = result["value"]
+        ratio = old / new if result["unit"] == "rows/s" else new / old
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {old:.4g} -> {new:.4g} {result['unit']} ({(ratio - 1) * 100:.0f}% worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks and golden output checks of the parameter calculator")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous JSON output")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline")
+    parser.add_argument("--rows", type=int, default=100000, help="designs per throughput batch")
+    parser.add_argument("--update-golden", action="store_true", help="regenerate tl_golden.json from tl_batch")
+    parser.add_argument("--skip", action="append", default=[], choices=["latency", "throughput", "rating", "import", "golden"])
+    args = parser.parse_args(argv)
+
+    if args.update_golden:
+        print(f"wrote {write_golden()} golden cases to {golden_path}")
+
+    report = {"meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                       "time": time.strftime("%Y-%m-%dT%H:%M:%S")}, "results": {}}
+    if "latency" not in args.skip:
+        report["results"].update(bench_latency())
+    if "throughput" not in args.skip:
+        report["results"].update(bench_throughput(args.rows))
+    if "rating" not in args.skip:
+        report["results"].update(bench_rating())
+    if "import" not in args.skip:
+        report["results"].update(bench_import())
+    for name, result in report["results"].items():
+        loads = f"  (loads {', '.join(result['loads'])})" if result.get("loads") else ""
+        print(f"{name:45s} {result['value']:12.2f} {result['unit']}{loads}")
+
+    failed = False
+    if "golden" not in args.skip:
+        with open(golden_path, encoding="utf-8") as f:
+            report["golden"] = check_golden(json.load(f))
+        for name, check in report["golden"].items():
+            status = "ok" if check["mismatches"] == 0 else f"{check['mismatches']} of {check['cases']} differ"
+            print(f"golden/{name:38s} {status}")
+            failed |= check["mismatches"] > 0
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report["results"], json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        failed |= bool(regressions)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1, ensure_ascii=False, default=str)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import math
+import numpy as np
+
+
+max_matrix_entries = 2**22
+
+
+def bundle_offsets(num_conductors, spacing):
+    # sub-conductor offsets of a regular polygon bundle with side `spacing`, flat side at the bottom
+    # spacing is a column (N,), result is (N, n, 2)
+    spacing = np.asarray(spacing, dtype=float).reshape(-1, 1)
+    if num_conductors == 1:
+        return np.zeros((len(spacing), 1, 2))
+    angles = 2 * math.pi * np.arange(num_conductors) / num_conductors - math.pi / 2 + math.pi / num_conductors
+    radius = spacing / (2 * math.sin(math.pi / num_conductors))
+    return np.stack([radius * np.cos(angles), radius * np.sin(angles)], axis=-1)
+
+
+def conductor_positions(coordinates, num_conductors, spacing):
+    # every sub-conductor of every phase, (N, P, 2) phase centres -> (N, P * n, 2)
+    coordinates = np.asarray(coordinates, dtype=float)
+    offsets = bundle_offsets(num_conductors, np.broadcast_to(spacing, coordinates.shape[:1]))
+    positions = coordinates[:, :, None, :] + offsets[:, None, :, :]
+    return positions.reshape(len(coordinates), -1, 2)
+
+
+def block_log_distances(coordinates, num_conductors, spacing):
+    # One distance matrix over all sub-conductors of a batch sharing the bundle size, reduced per phase:
+    # off diagonal (p, q) is the log GMD between the bundles of phases p and q,
+    # diagonal p is the within-bundle part sum(log d_ij, i != j) / n**2 of the bundle GMR.
+    # The bundle GMR (or equivalent radius) is then log(r) / n + diagonal.
+    positions = conductor_positions(coordinates, num_conductors, spacing)
+    n_rows, num_phases = len(positions), positions.shape[1] // num_conductors
+    diff = positions[:, :, None, :] - positions[:, None, :, :]
+    dist = np.sqrt((diff**2).sum(axis=-1))
+    dist[:, np.arange(dist.shape[1]), np.arange(dist.shape[1])] = 1.0  # own radius is added separately
+    with np.errstate(divide="ignore"):
+        log_d = np.log(dist)
+    blocks = log_d.reshape(n_rows, num_phases, num_conductors, num_phases, num_conductors)
+    return blocks.mean(axis=(2, 4))
+
+
+def bundle_log_distances(coordinates, num_conductors, spacing):
+    # block_log_distances for a batch with mixed bundle sizes, returns ((N, P, P) matrix, (N,) bundle part)
+    coordinates = np.asarray(coordinates, dtype=float)
+    num_conductors = np.broadcast_to(np.asarray(num_conductors), coordinates.shape[:1])
+    spacing = np.broadcast_to(np.asarray(spacing, dtype=float), coordinates.shape[:1])
+    num_phases = coordinates.shape[1]
+    log_d = np.empty((len(coordinates), num_phases, num_phases))
+    for n in np.unique(num_conductors):
+        rows = np.flatnonzero(num_conductors == n)
+        # bound the sub-conductor distance matrices to a few million entries at a time
+        block = max(1, max_matrix_entries // (num_phases * int(n)) ** 2)
+        for start in range(0, len(rows), block):
+            part = rows[start:start + block]
+            log_d[part] = block_log_distances(coordinates[part], int(n), spacing[part])
+    diagonal = np.arange(num_phases)
+    log_bundle = log_d[:, diagonal, diagonal].mean(axis=1)
+    return log_d, log_bundle
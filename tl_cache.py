@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tl_specs import conductor_specs, tower_types
+from tl_batch import (ERR_BUNDLE, ERR_BUNDLE_MIN, ERR_CIRCUITS, ERR_CONDUCTOR, ERR_COORDINATES, ERR_SPACING, ERR_TOWER,
+                      constants_from_log_distances, error_message, error_messages)
+from tl_bundle import bundle_log_distances
+from tl_constraints import valid
+from tl_profile import stage
+
+
+class LRUCache:
+    # bounded least recently used cache with hit/miss/eviction counters
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        # safe to share between threads, compute() runs outside the lock
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def get_many(self, keys, compute):
+        # values of a list of distinct keys, compute(missing keys) returns the values of all misses in one call
+        found, missing = {}, []
+        with self.lock:
+            for key in keys:
+                if key in self.data:
+                    self.hits += 1
+                    self.data.move_to_end(key)
+                    found[key] = self.data[key]
+                else:
+                    self.misses += 1
+                    missing.append(key)
+        if missing:
+            for key, value in zip(missing, compute(missing)):
+                self.put(key, value)
+                found[key] = value
+        return [found[key] for key in keys]
+
+    def put(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self.data), "maxsize": self.maxsize}
+
+
+# bundle distance matrices keyed on geometry only, per km constants keyed on the whole design
+geometry_cache = LRUCache(4096)
+parameter_cache = LRUCache(4096)
+
+
+def whole_number(value, message):
+    # int of a whole number (2, 2.0 or "2"), ValueError for fractions such as 2.7 that int() would truncate
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(message)
+    return int(number)
+
+
+def design_key(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors, decimals=6):
+    # normalised design tuple, coordinates rounded so float noise from the GUI does not miss the cache,
+    # raises ValueError for fractional circuit or bundle counts
+    num_circuits = whole_number(num_circuits, error_messages[ERR_CIRCUITS])
+    num_conductors = whole_number(num_conductors, "Number of conductors must be a whole number")
+    points = tuple((round(float(x), decimals), round(float(y), decimals)) for x, y in coordinates[:3 * num_circuits])
+    return (tower_type, num_circuits, points, num_conductors, round(float(distance_between_conductors), decimals), conductor_type)
+
+
+def per_km_parameters(key):
+    tower_type, num_circuits, points, num_conductors, distance_between_conductors, conductor_type = key
+    with stage("design.validation"):
+        if tower_type not in tower_types:
+            return error_message(ERR_TOWER, key)
+        tower_spec = tower_types[tower_type]
+        if num_circuits not in [1, 2] or len(points) != 3 * num_circuits:
+            return error_message(ERR_CIRCUITS, key)
+        if num_conductors < 1:
+            return error_message(ERR_BUNDLE_MIN, key)
+        if num_conductors > tower_spec["max_bundle"]:
+            return error_message(ERR_BUNDLE, key)
+        if num_conductors > 1 and not distance_between_conductors > 0:
+            return error_message(ERR_SPACING, key)
+        if conductor_type not in conductor_specs:
+            return error_message(ERR_CONDUCTOR, key)
+        if not valid(tower_type, num_circuits, np.array([points], dtype=float))[0]:
+            return error_message(ERR_COORDINATES, key)
+    conductor_spec = conductor_specs[conductor_type]
+
+    # bundle geometry is shared by every conductor choice on the same tower dressing
+    with stage("design.bundle"):
+        log_d, log_bundle = geometry_cache.get(
+            (points, num_conductors, distance_between_conductors),
+            lambda: bundle_log_distances(np.array([points], dtype=float), num_conductors, distance_between_conductors))
+    R, L, C, capacity = constants_from_log_distances(
+        log_d, log_bundle, np.array([num_circuits]), np.array([num_conductors]),
+        conductor_spec["GMR"], conductor_spec["diameter"], conductor_spec["R"], conductor_spec["I"], tower_spec["voltage"])
+    return float(R[0]), float(L[0]), float(C[0]), float(capacity[0])
+
+
+def cached_parameters(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors, length):
+    # drop-in for TransmissionLine.calculate_parameters: only a changed geometry or bundle recomputes,
+    # a changed length is a multiply on the cached per km values
+    with stage("design.calculate_parameters"):
+        try:
+            key = design_key(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors)
+        except ValueError as e:
+            return str(e)
+        per_km = parameter_cache.get(key, lambda: per_km_parameters(key))
+    if isinstance(per_km, str):
+        return per_km
+    R, L, C, capacity = per_km
+    return {
+        "R (Ω)": R * length,
+        "L (mH)": L * length,
+        "C (µF)": C * length,
+        "Capacity (MVA)": capacity,
+    }
+
+
+def cache_info():
+    return {"geometry": geometry_cache.info(), "parameters": parameter_cache.info()}
@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+
+here = os.path.dirname(os.path.abspath(__file__))
+# another catalog can be plugged in with the TL_CATALOG environment variable
+default_path = os.environ.get("TL_CATALOG", os.path.join(here, "tl_catalog.json"))
+tables = ("conductors", "towers")
+name_size = 32
+
+condition_pattern = re.compile(r"^\s*(\w+)\s*(<=|>=|==|<|>)\s*([-+0-9.eE]+)\s*$")
+
+
+class Table:
+    # catalog entries as one structured array with a sorted name index and lazily built
+    # sorted indexes of the numeric attributes, missing values are NaN
+    def __init__(self, data):
+        self.data = data
+        self.fields = [name for name in data.dtype.names if name != "name"]
+        self.name_order = np.argsort(data["name"], kind="stable")
+        self.sorted_names = data["name"][self.name_order]
+        self.indexes = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data["name"].tolist())
+
+    def __contains__(self, name):
+        return bool(self.rows([name])[0] >= 0)
+
+    def __getitem__(self, name):
+        row = self.rows([name])[0]
+        if row < 0:
+            raise KeyError(name)
+        return self.entry(row)
+
+    def entry(self, row):
+        record = self.data[row]
+        values = {field: record[field].item() for field in self.fields}
+        return {field: value for field, value in values.items() if value == value}  # drop NaN
+
+    def rows(self, names):
+        # row of every name, -1 where the name is not in the catalog
+        names = np.asarray(names).astype(str)
+        if len(self.sorted_names) == 0:
+            return np.full(names.shape, -1)
+        position = np.minimum(np.searchsorted(self.sorted_names, names), len(self.sorted_names) - 1)
+        return np.where(self.sorted_names[position] == names, self.name_order[position], -1)
+
+    def column(self, names, field):
+        # numeric column of a spec field for a column of names, NaN where unknown
+        rows = self.rows(names)
+        return np.where(rows >= 0, self.data[field][rows].astype(float), np.nan)
+
+    def index(self, field):
+        if field not in self.indexes:
+            values = self.data[field].astype(float)
+            order = np.argsort(values, kind="stable")
+            order = order[~np.isnan(values[order])]  # missing values never match a condition
+            self.indexes[field] = (order, values[order])
+        return self.indexes[field]
+
+    def select(self, field, op, value):
+        # rows where `field op value` from the sorted index of the field
+        order, values = self.index(field)
+        if op == "==":
+            lo, hi = np.searchsorted(values, value, "left"), np.searchsorted(values, value, "right")
+        elif op in ("<", "<="):
+            lo, hi = 0, np.searchsorted(values, value, "left" if op == "<" else "right")
+        else:
+            lo, hi = np.searchsorted(values, value, "right" if op == ">" else "left"), len(values)
+        return np.sort(order[lo:hi])
+
+    def query(self, *conditions, order_by=None, descending=False):
+        # entries matching every condition such as "R < 0.07", optionally sorted by a field
+        rows = np.arange(len(self.data))
+        for condition in conditions:
+            match = condition_pattern.match(condition)
+            if match is None or match.group(1) not in self.fields:
+                raise ValueError(f"Invalid catalog condition {condition!r}")
+            field, op, value = match.groups()
+            rows = np.intersect1d(rows, self.select(field, op, float(value)), assume_unique=True)
+        if order_by is not None:
+            rows = rows[np.argsort(self.data[order_by][rows], kind="stable")]
+            if descending:
+                rows = rows[::-1]
+        return self.data[rows]
+
+    def to_dicts(self):
+        # {name: {field: value}} in catalog order, the form of the old literal spec dicts
+        return {name: self.entry(row) for row, name in enumerate(self.data["name"].tolist())}
+
+
+def table_dtype(entries):
+    # every field seen in the entries, integer where all entries give an integer, float (NaN when missing) otherwise
+    fields = [("name", f"U{name_size}")]
+    for field in dict.fromkeys(key for entry in entries for key in entry if key != "name"):
+        values = [entry.get(field) for entry in entries]
+        integer = all(isinstance(v, int) and not isinstance(v, bool) for v in values)
+        fields.append((field, np.int64 if integer else np.float64))
+    return np.dtype(fields)
+
+
+def read_json(path=default_path):
+    with open(path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    arrays = {}
+    for table in tables:
+        entries = catalog.get(table, [])
+        data = np.zeros(len(entries), dtype=table_dtype(entries))
+        for field in data.dtype.names:
+            data[field] = [entry.get(field, np.nan) for entry in entries]
+        arrays[table] = data
+    return arrays
+
+
+def binary_path(path, table):
+    return f"{os.path.splitext(path)[0]}.{table}.npy"
+
+
+def build(path=default_path):
+    # write the pre-built binary form next to the catalog, returns the written files
+    written = []
+    for table, data in read_json(path).items():
+        np.save(binary_path(path, table), data)
+        written.append(binary_path(path, table))
+    return written
+
+
+def load(path=default_path):
+    # {table: Table}, memory mapped from the pre-built files when they are newer than the catalog,
+    # otherwise parsed from the catalog and rebuilt (kept in memory if the directory is read only)
+    stamp = os.path.getmtime(path)
+    binaries = [binary_path(path, table) for table in tables]
+    if all(os.path.exists(p) and os.path.getmtime(p) >= stamp for p in binaries):
+        return {table: Table(np.load(p, mmap_mode="r")) for table, p in zip(tables, binaries)}
+    arrays = read_json(path)
+    try:
+        for table, data in arrays.items():
+            np.save(binary_path(path, table), data)
+    except OSError:
+        pass
+    return {table: Table(data) for table, data in arrays.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Conductor and tower catalog")
+    parser.add_argument("--catalog", default=default_path, help="catalog JSON file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="write the pre-built binary catalog")
+    query = commands.add_parser("query", help="list catalog entries matching conditions")
+    query.add_argument("table", choices=tables)
+    query.add_argument("conditions", nargs="*", help='conditions such as "R<0.07"')
+    query.add_argument("--order-by", help="sort by this field")
+    query.add_argument("--descending", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        for written in build(args.catalog):
+            print(f"wrote {written}")
+    elif args.command == "query":
+        table = load(args.catalog)[args.table]
+        for record in table.query(*args.conditions, order_by=args.order_by, descending=args.descending):
+            print(record["name"], " ".join(f"{field}={record[field]:g}" for field in table.fields))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
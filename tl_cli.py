@@ -0,0 +1,205 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from tl_batch import calculate_parameters_batch, error_message
+
+
+coordinate_columns = tuple(f"{axis}{i+1}" for i in range(6) for axis in "xy")
+design_columns = ("tower_type", "num_circuits", "conductor_type", "num_conductors", "distance_between_conductors", "length") + coordinate_columns
+result_columns = ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)")
+numeric_columns = ("num_circuits", "num_conductors", "distance_between_conductors", "length") + coordinate_columns
+
+
+# readers yield chunks as {column: list of values}
+
+def read_csv(path, chunk_size):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            columns = itertools.zip_longest(*rows, fillvalue="")
+            yield dict(zip(header, map(list, columns)))
+
+
+def read_jsonl(path, chunk_size):
+    with open(path, encoding="utf-8") as f:
+        while True:
+            rows = [json.loads(line) for line in itertools.islice(f, chunk_size) if line.strip()]
+            if not rows:
+                return
+            names = dict.fromkeys(name for row in rows for name in row)
+            yield {name: [row.get(name) for row in rows] for name in names}
+
+
+def read_parquet(path, chunk_size):
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pydict()
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.columns = columns
+        self.writer.writerow(columns)
+
+    def write(self, chunk):
+        self.writer.writerows(zip(*(np.asarray(chunk[name]).tolist() for name in self.columns)))
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write(self, chunk):
+        values = []
+        for name in self.columns:
+            column = np.asarray(chunk[name])
+            if column.dtype.kind == "f":
+                column = np.where(np.isnan(column), None, column)
+            values.append(column.tolist())
+        for row in zip(*values):
+            self.file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.pq = pq
+        self.path = path
+        self.columns = columns
+        self.writer = None
+
+    def write(self, chunk):
+        table = self.pa.table({name: np.asarray(chunk[name]) for name in self.columns})
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+readers = {"csv": read_csv, "jsonl": read_jsonl, "parquet": read_parquet}
+writers = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def table_format(path, given=None):
+    if given:
+        return given
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return {"ndjson": "jsonl", "json": "jsonl", "pq": "parquet"}.get(extension, extension)
+
+
+def to_float(values):
+    # numeric column, NaN where a value is missing or not a number
+    try:
+        return np.array(["nan" if v is None or v == "" else v for v in values], dtype=float)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
+
+def evaluate_chunk(chunk):
+    n_rows = len(next(iter(chunk.values())))
+    missing = np.full(n_rows, None)
+    values = {name: to_float(chunk.get(name, missing)) for name in numeric_columns}
+    coordinates = np.stack([values[name] for name in coordinate_columns], axis=1).reshape(n_rows, 6, 2)
+    num_circuits = values["num_circuits"]
+    num_conductors = values["num_conductors"]
+
+    # any circuit count but 1 or 2 (fractions included) is an invalid number of circuits, passed on as 0,
+    # a fractional bundle is not a valid number
+    circuits = np.where((num_circuits == 1) | (num_circuits == 2), num_circuits, 0).astype(int)
+    # a row needs its numbers and the coordinates of every phase of its circuits
+    needed = np.arange(6)[None, :] < 3 * circuits[:, None]
+    bad = np.isnan([values[name] for name in numeric_columns[:4]]).any(axis=0)
+    bad |= num_conductors != np.round(num_conductors)
+    bad |= (np.isnan(coordinates).any(axis=-1) & needed).any(axis=1)
+
+    tower_type = np.array(chunk.get("tower_type", missing), dtype=object).astype(str)
+    conductor_type = np.array(chunk.get("conductor_type", missing), dtype=object).astype(str)
+    result = calculate_parameters_batch(
+        tower_type, circuits, np.nan_to_num(coordinates), np.nan_to_num(num_conductors).astype(int),
+        conductor_type, values["distance_between_conductors"], values["length"])
+
+    error = np.full(n_rows, "", dtype=object)
+    for i in np.flatnonzero(result["error"]):
+        error[i] = error_message(result["error"][i], (tower_type[i], circuits[i], coordinates[i]))
+    error[bad] = "Missing or invalid numeric value"
+    out = {name: chunk.get(name, missing) for name in design_columns}
+    for name in result_columns:
+        out[name] = np.where(bad, np.nan, result[name])
+    out["error"] = error
+    return out
+
+
+def run_batch(input_path, output_path, input_format=None, output_format=None, chunk_size=100000):
+    reader = readers[table_format(input_path, input_format)]
+    writer = writers[table_format(output_path, output_format)](output_path, design_columns + result_columns + ("error",))
+    rows = failed = 0
+    start_time = time.perf_counter()
+    try:
+        for chunk in reader(input_path, chunk_size):
+            out = evaluate_chunk(chunk)
+            writer.write(out)
+            rows += len(out["error"])
+            failed += int((out["error"] != "").sum())
+            elapsed = time.perf_counter() - start_time
+            print(f"\r{rows} rows, {rows / elapsed:.0f} rows/s", end="", file=sys.stderr)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start_time
+    print(f"\r{rows} rows ({failed} with errors) in {elapsed:.2f} s, {rows / max(elapsed, 1e-9):.0f} rows/s", file=sys.stderr)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="tl", description="Transmission line parameter calculator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="calculate parameters for every design in a table")
+    batch.add_argument("input", help="design table (.csv, .jsonl or .parquet)")
+    batch.add_argument("output", help="result table (.csv, .jsonl or .parquet)")
+    batch.add_argument("--input-format", choices=list(readers))
+    batch.add_argument("--output-format", choices=list(writers))
+    batch.add_argument("--chunk", type=int, default=100000, help="rows per chunk")
+
+    commands.add_parser("interactive", help="enter one design at the prompt")
+
+    args = parser.parse_args(argv)
+    if args.command == "batch":
+        run_batch(args.input, args.output, args.input_format, args.output_format, args.chunk)
+    elif args.command == "interactive":
+        import tl_main
+        tl_main.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import numpy as np
+
+from tl_specs import tower_types
+
+
+# number of circuits each tower carries
+tower_circuits = {name: spec["circuits"] for name, spec in tower_types.items()}
+max_phases = 6
+
+
+def phase_ranges(tower_type):
+    # allowed x intervals and the y interval of every phase slot of the tower
+    spec = tower_types[tower_type]
+    heights = (spec["min_height"], spec["max_height"])
+    if "max_horizontal_center" in spec:
+        side = [(-spec["max_horizontal_side"], -spec["min_horizontal_side"]), (spec["min_horizontal_side"], spec["max_horizontal_side"])]
+        center = [(-spec["max_horizontal_center"], spec["max_horizontal_center"])]
+        slots = [side, center, side]
+    else:
+        side = [(-spec["max_horizontal"], -spec["min_horizontal"]), (spec["min_horizontal"], spec["max_horizontal"])]
+        slots = [side] * 3
+    return [(xs, heights) for xs in slots * tower_circuits[tower_type]]
+
+
+def compile_limits():
+    # limit tables indexed [tower, phase]: x_lo and x_hi (T + 1, 6, 2) hold up to two allowed x intervals,
+    # y_lo and y_hi (T + 1, 6) the heights. A second circuit on a single circuit tower gets the same slots,
+    # the extra last tower row leaves unknown tower types unconstrained (they fail the tower check instead).
+    index = {name: t for t, name in enumerate(tower_types)}
+    shape = (len(index) + 1, max_phases)
+    x_lo, x_hi = np.full(shape + (2,), -np.inf), np.full(shape + (2,), np.inf)
+    y_lo, y_hi = np.full(shape, -np.inf), np.full(shape, np.inf)
+    for name, t in index.items():
+        slots = phase_ranges(name)
+        for phase in range(max_phases):
+            x_ranges, (y_lo[t, phase], y_hi[t, phase]) = slots[phase % len(slots)]
+            intervals = (x_ranges * 2)[:2]
+            x_lo[t, phase] = [lo for lo, _ in intervals]
+            x_hi[t, phase] = [hi for _, hi in intervals]
+    return index, x_lo, x_hi, y_lo, y_hi
+
+
+tower_index, x_lo, x_hi, y_lo, y_hi = compile_limits()
+
+
+def violations(tower_type, num_circuits, coordinates):
+    # (N, P) masks of the x and y coordinates outside the tower limits for N designs of P phases,
+    # bounds are inclusive and NaN is a violation. Phases beyond 3 * num_circuits are never flagged.
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows, num_phases = coordinates.shape[:2]
+    tower_type = np.broadcast_to(np.asarray(tower_type), (n_rows,))
+    num_circuits = np.broadcast_to(np.asarray(num_circuits), (n_rows,))
+    names, inverse = np.unique(tower_type, return_inverse=True)
+    t = np.array([tower_index.get(name, len(tower_index)) for name in names], dtype=int)[inverse.reshape(-1)]
+
+    x, y = coordinates[..., 0], coordinates[..., 1]
+    x_ok = ((x[..., None] >= x_lo[t, :num_phases]) & (x[..., None] <= x_hi[t, :num_phases])).any(axis=-1)
+    y_ok = (y >= y_lo[t, :num_phases]) & (y <= y_hi[t, :num_phases])
+    used = np.arange(num_phases)[None, :] < 3 * num_circuits[:, None]
+    return ~x_ok & used, ~y_ok & used
+
+
+def valid(tower_type, num_circuits, coordinates):
+    x_bad, y_bad = violations(tower_type, num_circuits, coordinates)
+    return ~(x_bad | y_bad).any(axis=1)
+
+
+def limit_message(tower_type, phase, axis):
+    slots = phase_ranges(tower_type)
+    x_ranges, (lo, hi) = slots[phase % len(slots)]
+    if axis == "y":
+        limit = f"y between {lo:g} m and {hi:g} m"
+    elif len(x_ranges) == 1:
+        limit = f"|x| at most {x_ranges[0][1]:g} m"
+    else:
+        limit = f"|x| between {x_ranges[1][0]:g} m and {x_ranges[1][1]:g} m"
+    return f"Phase {phase % 3 + 1} of circuit {phase // 3 + 1} must have {limit} on a {tower_type} tower"
+
+
+def messages(tower_type, x_bad, y_bad):
+    # message of the first violated limit of every row, "" where the row is valid
+    n_rows = x_bad.shape[0]
+    tower_type = np.broadcast_to(np.asarray(tower_type), (n_rows,))
+    bad = np.stack([x_bad, y_bad], axis=-1).reshape(n_rows, -1)  # phase by phase, x before y
+    rows = np.flatnonzero(bad.any(axis=1))
+    width = bad.shape[1]
+    names, tower = np.unique(tower_type[rows], return_inverse=True)
+    combos, inverse = np.unique(tower.reshape(-1) * width + bad[rows].argmax(axis=1), return_inverse=True)
+    text = [limit_message(names[c // width], c % width // 2, "xy"[c % 2]) for c in combos]
+    out = np.full(n_rows, "", dtype=object)
+    out[rows] = np.array(text, dtype=object)[inverse.reshape(-1)] if text else []
+    return out
+
+
+def check(tower_type, num_circuits, coordinates):
+    # single design, raises ValueError listing every violated limit
+    x_bad, y_bad = violations(tower_type, num_circuits, np.asarray(coordinates, dtype=float)[None])
+    failed = [limit_message(tower_type, phase, axis) for phase in range(x_bad.shape[1])
+              for axis, bad in (("x", x_bad), ("y", y_bad)) if bad[0, phase]]
+    if failed:
+        raise ValueError("\n".join(failed))
@@ -0,0 +1,20 @@
+from tl_specs import conductor_specs, tower_types, mu0, eps0  # noqa: F401 re-exported
+from tl_cache import cached_parameters
+
+
+class TransmissionLine:
+    def __init__(self, tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors, length):
+        self.tower_type = tower_type
+        self.num_circuits = num_circuits
+        self.coordinates = coordinates
+        self.num_conductors = num_conductors
+        self.conductor_type = conductor_type
+        self.distance_between_conductors = distance_between_conductors
+        self.length = length
+
+    def calculate_parameters(self):
+        # R (Ω), L (mH), C (µF) and capacity (MVA) of the line, or the error message of an invalid design.
+        # The per km values come from the vectorized engine (tl_batch) through the LRU cache, so the GUI,
+        # the CLI and the batch tools all give the same numbers.
+        return cached_parameters(self.tower_type, self.num_circuits, self.coordinates, self.num_conductors,
+                                 self.conductor_type, self.distance_between_conductors, self.length)
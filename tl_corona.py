@@ -0,0 +1,65 @@
+import math
+import numpy as np
+
+from tl_specs import conductors, eps0, towers
+from tl_batch import ERR_OK, design_errors, log_gmd, lookup
+from tl_matrix import phase_charges, phase_voltages
+
+
+# Peek's corona onset defaults
+surface_factor = 0.82  # stranded conductor surface irregularity factor m
+air_density = 1.0  # relative air density δ
+onset_margin = 1.0  # designs whose maximum gradient exceeds margin * onset are corona violating
+
+def onset_gradient(radius, air_density=air_density, surface_factor=surface_factor):
+    # Peek's visual corona onset gradient, peak kV/cm, radius in m
+    r_cm = radius * 100
+    return 30 * surface_factor * air_density * (1 + 0.301 / np.sqrt(air_density * r_cm))
+
+
+def corona_batch(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors,
+                 frequency=50.0, air_density=air_density, surface_factor=surface_factor, margin=onset_margin):
+    # Surface gradients of N designs with the same arguments as calculate_parameters_batch.
+    # Phase charges come from the potential coefficients with ground images, the maximum sub-conductor
+    # gradient follows Markt-Mengele: E_max = q / (2π ε0 n r) * (1 + (n - 1) r / R) with R the bundle
+    # radius. Loss is Peek's estimate with the onset voltage scaled from the gradient ratio.
+    # Returns peak gradients in kV/cm (N, P), onset (N,), a violation mask (N,) and loss in kW/km (N,).
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows, num_phases = coordinates.shape[:2]
+    column = lambda v, dtype=None: np.broadcast_to(np.asarray(v, dtype=dtype), (n_rows,))
+    tower_type, conductor_type = column(tower_type), column(conductor_type)
+    num_circuits, num_conductors = column(num_circuits, int), column(num_conductors, int)
+    spacing = column(distance_between_conductors, float)
+
+    gradient = np.full((n_rows, num_phases), np.nan)
+    onset = np.full(n_rows, np.nan)
+    loss = np.full(n_rows, np.nan)
+    ok = design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing) == ERR_OK
+    ok &= num_circuits * 3 == num_phases
+    if ok.any():
+        coordinates, n, spacing = coordinates[ok], num_conductors[ok], spacing[ok]
+        radius = lookup(conductor_type[ok], conductors, "diameter") * 1e-3 / 2
+        voltage = lookup(tower_type[ok], towers, "voltage")
+
+        V = math.sqrt(2) * phase_voltages(voltage, num_phases)  # peak
+        q, log_d, log_req = phase_charges(coordinates, n, radius, spacing, V)
+        q = np.abs(q)  # C/m peak
+
+        bundle_radius = np.where(n > 1, spacing / (2 * np.sin(math.pi / np.maximum(n, 2))), np.inf)
+        e_avg = q / (2 * math.pi * eps0 * (n * radius)[:, None])
+        gradient[ok] = e_avg * (1 + (n - 1) * radius / bundle_radius)[:, None] / 1e5  # V/m -> kV/cm
+        onset[ok] = onset_gradient(radius, air_density, surface_factor)
+
+        # Peek: P = 241 / δ (f + 25) sqrt(r / D) (V - V0)² 1e-5 kW/km per phase with rms phase kV
+        v_phase = voltage[:, None] / math.sqrt(3) / 1e3
+        v_onset = v_phase * onset[ok][:, None] / gradient[ok]
+        excess = np.maximum(v_phase - v_onset, 0)
+        gmd = np.exp(log_gmd(log_d, num_circuits[ok]))
+        loss[ok] = (241 / air_density * (frequency + 25) * np.sqrt(np.exp(log_req) / gmd)[:, None] * excess**2 * 1e-5).sum(axis=1)
+
+    return {
+        "Max gradient (kV/cm)": gradient,
+        "Onset gradient (kV/cm)": onset,
+        "Corona": gradient.max(axis=1) > margin * onset,  # False for invalid designs
+        "Corona loss (kW/km)": loss,
+    }
@@ -0,0 +1,201 @@
+import argparse
+import itertools
+import math
+import sys
+
+import numpy as np
+
+from tl_batch import design_errors, error_message
+from tl_matrix import phase_matrices, sequence_components
+
+
+# a segment is a dict with the TransmissionLine design fields (num_circuits follows from the coordinates)
+# and an optional "transposition": 0, 1 or 2 phase positions rotated, or "cycle" for a full transposition
+# cycle of three equal sections inside the segment
+
+
+def rotation(num_phases, shift):
+    # phase order of each circuit rotated by `shift` positions (a -> b -> c)
+    return np.array([3 * (i // 3) + (i + shift) % 3 for i in range(num_phases)])
+
+
+def transposed(matrix, transposition):
+    # (N, P, P) per km matrices seen from the corridor phases after the rotation of each segment
+    num_phases = matrix.shape[-1]
+    out = np.empty_like(matrix)
+    for shift in (0, 1, 2):
+        rows = np.array([t == shift for t in transposition])
+        order = rotation(num_phases, shift)
+        out[rows] = matrix[rows][:, order][:, :, order]
+    cycle = np.array([t == "cycle" for t in transposition])
+    if cycle.any():
+        out[cycle] = np.mean([matrix[cycle][:, order][:, :, order] for order in (rotation(num_phases, k) for k in range(3))], axis=0)
+    return out
+
+
+def segment_contributions(segments, frequency=50.0, earth_resistivity=100.0):
+    # series impedance (N, P, P) in Ω and shunt capacitance (N, P, P) in µF of N segments in one batch,
+    # raises ValueError naming the first invalid segment
+    coordinates = np.array([segment["coordinates"] for segment in segments], dtype=float)
+    tower_type = np.array([segment["tower_type"] for segment in segments])
+    num_conductors = np.array([segment["num_conductors"] for segment in segments], dtype=int)
+    conductor_type = np.array([segment["conductor_type"] for segment in segments])
+    spacing = np.array([segment["distance_between_conductors"] for segment in segments], dtype=float)
+    length = np.array([segment["length"] for segment in segments], dtype=float)
+    transposition = [segment.get("transposition", 0) for segment in segments]
+
+    num_circuits = np.full(len(segments), coordinates.shape[1] // 3)
+    error = design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing)
+    bad = np.flatnonzero(error)
+    if bad.size:
+        row = bad[0]
+        raise ValueError(f"Segment {row}: {error_message(error[row], (tower_type[row], num_circuits[row], coordinates[row]))}")
+    if any(t not in (0, 1, 2, "cycle") for t in transposition):
+        raise ValueError("Transposition must be 0, 1, 2 or \"cycle\"")
+
+    matrices = phase_matrices(coordinates, num_conductors, conductor_type, spacing, frequency, earth_resistivity)
+    Z = transposed(matrices["Z (Ω/km)"], transposition) * length[:, None, None]
+    C = transposed(matrices["C (µF/km)"], transposition) * length[:, None, None]
+    return Z, C
+
+
+def parallel_equivalent(Z, C):
+    # 3 x 3 matrices of the two circuits of a 6 x 6 system in parallel (same voltage at both ends),
+    # admittances add block by block: Y_eq = Y11 + Y12 + Y21 + Y22
+    if Z.shape[-1] == 3:
+        return Z, C
+    blocks = lambda M: M[..., :3, :3] + M[..., :3, 3:] + M[..., 3:, :3] + M[..., 3:, 3:]
+    return np.linalg.inv(blocks(np.linalg.inv(Z))), blocks(C)
+
+
+class Corridor:
+    # A line made of many segments. Every segment's series impedance and shunt capacitance matrices are
+    # kept so the corridor totals are running sums: adding, replacing or removing a segment only computes
+    # that segment and applies the difference. refresh() re-adds all contributions to drop rounding drift.
+    def __init__(self, frequency=50.0, earth_resistivity=100.0):
+        self.frequency = frequency
+        self.earth_resistivity = earth_resistivity
+        self.segments = {}
+        self.contributions = {}
+        self.next_id = 0
+        self.num_phases = None
+        self.Z = None
+        self.C = None
+        self.length = 0.0
+
+    def __len__(self):
+        return len(self.segments)
+
+    def extend(self, segments, chunk_size=1024):
+        # add segments from any iterable (a generator reading a file is never held in memory whole),
+        # evaluated chunk_size at a time, returns the ids of the new segments
+        ids = []
+        segments = iter(segments)
+        while True:
+            chunk = list(itertools.islice(segments, chunk_size))
+            if not chunk:
+                return ids
+            Z, C = self.contributions_of(chunk)
+            for segment, z, c in zip(chunk, Z, C):
+                ids.append(self.next_id)
+                self.apply(self.next_id, dict(segment), (z, c))
+                self.next_id += 1
+
+    def add(self, segment):
+        return self.extend([segment])[0]
+
+    def update(self, segment_id, **changes):
+        # edit one segment, only its contribution is recomputed
+        segment = {**self.segments[segment_id], **changes}
+        Z, C = self.contributions_of([segment])
+        self.apply(segment_id, segment, (Z[0], C[0]))
+
+    def remove(self, segment_id):
+        z, c = self.contributions.pop(segment_id)
+        self.Z -= z
+        self.C -= c
+        self.length -= self.segments.pop(segment_id)["length"]
+
+    def contributions_of(self, segments):
+        num_phases = {len(segment["coordinates"]) for segment in segments}
+        if self.num_phases is not None:
+            num_phases.add(self.num_phases)
+        if len(num_phases) > 1:
+            raise ValueError("Every segment of a corridor must carry the same number of circuits")
+        return segment_contributions(segments, self.frequency, self.earth_resistivity)
+
+    def apply(self, segment_id, segment, contribution):
+        z, c = contribution
+        if self.Z is None:
+            self.num_phases = z.shape[-1]
+            self.Z = np.zeros_like(z)
+            self.C = np.zeros_like(c)
+        if segment_id in self.contributions:
+            self.remove(segment_id)
+        self.segments[segment_id] = segment
+        self.contributions[segment_id] = (z, c)
+        self.Z += z
+        self.C += c
+        self.length += segment["length"]
+
+    def refresh(self):
+        if self.contributions:
+            self.Z = np.sum([z for z, _ in self.contributions.values()], axis=0)
+            self.C = np.sum([c for _, c in self.contributions.values()], axis=0)
+            self.length = math.fsum(segment["length"] for segment in self.segments.values())
+
+    def parameters(self):
+        # totals of the corridor: phase matrices and the positive sequence R (Ω), L (mH), C (µF),
+        # double circuits as both circuits in parallel like the single design model
+        if not self.segments:
+            raise ValueError("The corridor has no segments")
+        Z, C = parallel_equivalent(self.Z, self.C)
+        Z012 = sequence_components(Z[None])[0]
+        Z1 = Z012[1, 1]
+        C1 = sequence_components(C[None])[0, 1, 1]
+        return {
+            "Length (km)": self.length,
+            "R (Ω)": Z1.real,
+            "L (mH)": Z1.imag / (2 * math.pi * self.frequency) * 1e3,
+            "C (µF)": C1.real,
+            "Z (Ω)": self.Z,
+            "C matrix (µF)": self.C,
+            "Unbalance (%)": 100 * abs(Z012[2, 1]) / abs(Z1),  # negative sequence coupling of positive sequence current
+        }
+
+
+def read_segments(path, chunk_size=10000):
+    # stream segments from a design table in the tl_cli batch format with an optional transposition column
+    from tl_cli import coordinate_columns, readers, table_format
+    for chunk in readers[table_format(path)](path, chunk_size):
+        for i in range(len(chunk["tower_type"])):
+            num_phases = 3 * int(float(chunk["num_circuits"][i]))
+            values = [float(chunk[name][i]) for name in coordinate_columns[:2 * num_phases]]
+            transposition = str((chunk.get("transposition") or [""] * (i + 1))[i] or 0)
+            yield {
+                "tower_type": chunk["tower_type"][i],
+                "coordinates": np.reshape(values, (num_phases, 2)),
+                "num_conductors": int(float(chunk["num_conductors"][i])),
+                "conductor_type": chunk["conductor_type"][i],
+                "distance_between_conductors": float(chunk["distance_between_conductors"][i]),
+                "length": float(chunk["length"][i]),
+                "transposition": transposition if transposition == "cycle" else int(float(transposition)),
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totals of a corridor made of many line segments")
+    parser.add_argument("segments", help="segment table (.csv, .jsonl or .parquet) in the tl_cli batch format")
+    parser.add_argument("--frequency", type=float, default=50.0)
+    parser.add_argument("--earth-resistivity", type=float, default=100.0, help="Ω·m")
+    args = parser.parse_args(argv)
+    corridor = Corridor(args.frequency, args.earth_resistivity)
+    corridor.extend(read_segments(args.segments))
+    result = corridor.parameters()
+    print(f"{len(corridor)} segments, {result['Length (km)']:.3f} km")
+    for key in ("R (Ω)", "L (mH)", "C (µF)", "Unbalance (%)"):
+        print(f"{key}: {result[key]:.6g}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import argparse
+import csv
+import math
+import sys
+
+import numpy as np
+
+from tl_specs import conductors, eps0, mu0, towers
+from tl_batch import ERR_OK, design_errors, lookup
+from tl_matrix import A, phase_charges, phase_voltages
+from tl_sag import effective_coordinates, sag, stringing_temperature
+
+
+# public exposure reference levels at 50 Hz (ICNIRP 2010)
+e_limit = 5.0  # kV/m
+b_limit = 200.0  # µT
+max_chunk_entries = 2**22  # designs * points * phases evaluated at once
+
+
+def lateral_points(half_width=100.0, step=1.0, height=1.0):
+    # (M, 2) points across the right-of-way at `height` above ground
+    xs = np.linspace(-half_width, half_width, int(round(2 * half_width / step)) + 1)
+    return np.stack([xs, np.full_like(xs, height)], axis=1)
+
+
+def grid_points(xs, ys):
+    # (len(ys) * len(xs), 2) points of a 2-D grid for contour plots, row by row in y
+    X, Y = np.meshgrid(xs, ys)
+    return np.stack([X.ravel(), Y.ravel()], axis=1)
+
+
+def electric_field(points, positions, charges):
+    # rms E (kV/m) at (M, 2) points from (N, P, 2) line charges (N, P) in C/m with their ground images, (N, M)
+    d = points[None, :, None, :] - positions[:, None, :, :]
+    d_image = points[None, :, None, :] - positions[:, None, :, :] * np.array([1, -1])
+    with np.errstate(divide="ignore", invalid="ignore"):  # NaN at a point on a conductor
+        field = d / (d**2).sum(axis=-1, keepdims=True) - d_image / (d_image**2).sum(axis=-1, keepdims=True)
+    E = (field * charges[:, None, :, None]).sum(axis=2) / (2 * math.pi * eps0)  # (N, M, 2) complex V/m
+    return np.sqrt((np.abs(E)**2).sum(axis=-1)) / 1e3
+
+
+def magnetic_field(points, positions, currents):
+    # rms B (µT) at (M, 2) points from (N, P, 2) phase currents (N, P) in A, earth return neglected, (N, M)
+    d = points[None, :, None, :] - positions[:, None, :, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        field = np.stack([-d[..., 1], d[..., 0]], axis=-1) / (d**2).sum(axis=-1, keepdims=True)
+    B = (field * currents[:, None, :, None]).sum(axis=2) * mu0 / (2 * math.pi)  # (N, M, 2) complex T
+    return np.sqrt((np.abs(B)**2).sum(axis=-1)) * 1e6
+
+
+def field_profiles(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors,
+                   points=None, current=None, chunk_entries=max_chunk_entries, span=None, temperature=stringing_temperature):
+    # E and B of N designs (columns as in calculate_parameters_batch) at (M, 2) points, default 1 m above
+    # ground over ±100 m. Phase voltages come from the tower voltage, phase currents from the conductor
+    # rating times the bundle size unless `current` (A per phase, scalar or (N,)) is given.
+    # Returns (N, M) profiles, their maxima (N,) and the (N,) mask of designs over the exposure limits;
+    # designs are evaluated in chunks of about chunk_entries designs * points * phases.
+    # With a span (m) the conductors sit at their effective height for that span and conductor temperature.
+    points = lateral_points() if points is None else np.asarray(points, dtype=float)
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows, num_phases = coordinates.shape[:2]
+    column = lambda v, dtype=None: np.broadcast_to(np.asarray(v, dtype=dtype), (n_rows,))
+    tower_type, conductor_type = column(tower_type), column(conductor_type)
+    num_circuits, num_conductors = column(num_circuits, int), column(num_conductors, int)
+    spacing = column(distance_between_conductors, float)
+    if current is None:
+        current = lookup(conductor_type, conductors, "I") * num_conductors
+    current = column(current, float)
+
+    E = np.full((n_rows, len(points)), np.nan)
+    B = np.full((n_rows, len(points)), np.nan)
+    ok = np.flatnonzero((design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing) == ERR_OK)
+                        & (3 * num_circuits == num_phases))
+    positions = coordinates.copy()
+    if span is not None:
+        ok = ok[column(span, float)[ok] > 0]  # rows without a valid span stay NaN like invalid designs
+        sags = sag(conductor_type[ok], column(span, float)[ok], column(temperature, float)[ok])[0]
+        positions[ok] = effective_coordinates(coordinates[ok], sags)
+    block = max(1, chunk_entries // (len(points) * num_phases))
+    for start in range(0, len(ok), block):
+        rows = ok[start:start + block]
+        radius = lookup(conductor_type[rows], conductors, "diameter") * 1e-3 / 2
+        voltage = phase_voltages(lookup(tower_type[rows], towers, "voltage"), num_phases)
+        charges = phase_charges(positions[rows], num_conductors[rows], radius, spacing[rows], voltage)[0]
+        currents = current[rows, None] * np.tile(A[1], num_phases // 3)
+        E[rows] = electric_field(points, positions[rows], charges)
+        B[rows] = magnetic_field(points, positions[rows], currents)
+
+    max_e = np.fmax.reduce(E, axis=1)
+    max_b = np.fmax.reduce(B, axis=1)
+    return {
+        "E (kV/m)": E,
+        "B (µT)": B,
+        "Max E (kV/m)": max_e,
+        "Max B (µT)": max_b,
+        "Over limit": (max_e > e_limit) | (max_b > b_limit),  # False for invalid designs
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Electric and magnetic field profile of one design")
+    parser.add_argument("tower_type", choices=list(towers))
+    parser.add_argument("conductor_type", choices=list(conductors))
+    parser.add_argument("num_conductors", type=int)
+    parser.add_argument("coordinates", nargs="+", help="phase positions as x,y (3 or 6 of them, put -- before them when an x is negative)")
+    parser.add_argument("--spacing", type=float, default=0.4, help="distance between conductors in the bundle (m)")
+    parser.add_argument("--current", type=float, help="phase current (A), default the bundle rating")
+    parser.add_argument("--height", type=float, default=1.0, help="height of the profile (m)")
+    parser.add_argument("--half-width", type=float, default=100.0, help="profile from -w to w (m)")
+    parser.add_argument("--step", type=float, default=1.0, help="profile point spacing (m)")
+    parser.add_argument("--span", type=float, help="span length (m), conductors at their effective height after sag")
+    parser.add_argument("--temperature", type=float, default=stringing_temperature, help="conductor temperature for the sag (°C)")
+    parser.add_argument("-o", "--output", default="fields.csv")
+    args = parser.parse_args(argv)
+
+    coordinates = [[float(v) for v in point.split(",")] for point in args.coordinates]
+    points = lateral_points(args.half_width, args.step, args.height)
+    result = field_profiles(args.tower_type, len(coordinates) // 3, [coordinates], args.num_conductors, args.conductor_type,
+                            args.spacing, points, args.current, span=args.span, temperature=args.temperature)
+    if np.isnan(result["Max E (kV/m)"][0]):
+        parser.error("invalid design, check the coordinates against the tower limits")
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["x (m)", "E (kV/m)", "B (µT)"])
+        writer.writerows(zip(points[:, 0].tolist(), result["E (kV/m)"][0].tolist(), result["B (µT)"][0].tolist()))
+    print(f"max E {result['Max E (kV/m)'][0]:.3f} kV/m, max B {result['Max B (µT)'][0]:.2f} µT, "
+          f"{'over' if result['Over limit'][0] else 'within'} the exposure limits, profile written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
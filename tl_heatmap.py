@@ -0,0 +1,97 @@
+import numpy as np
+
+from tl_specs import conductor_specs
+from tl_batch import calculate_parameters_batch
+from tl_cache import LRUCache, design_key
+from tl_constraints import phase_ranges
+
+
+metrics = ("L (mH)", "C (µF)", "Capacity (MVA)")
+per_km_metrics = ("L (mH)", "C (µF)")  # scaled by the line length, capacity does not depend on it
+tile_size = 32
+spacing_range = (0.1, 1.0)
+
+# evaluated per km tiles keyed on everything that changes their values, so every line length shares them
+tile_cache = LRUCache(2048)
+
+# viridis-like colour ramp, NaN pixels are painted gray
+ramp = np.array([[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]], dtype=float)
+nan_color = np.array([128, 128, 128], dtype=np.uint8)
+
+
+def axes(design, mode, resolution):
+    # x and y axis values of the heatmap: mode is a phase index (its x, y position is varied)
+    # or "bundle" (bundle spacing against conductor type)
+    tower_type, num_circuits = design[0], design[1]
+    if mode == "bundle":
+        return np.linspace(*spacing_range, resolution), np.arange(len(conductor_specs))
+    slots = phase_ranges(tower_type)
+    if not 0 <= mode < min(len(slots), 3 * num_circuits):
+        raise ValueError(f"Phase {mode + 1} is not used by {num_circuits} circuit(s) on a {tower_type} tower")
+    x_ranges, (y_lo, y_hi) = slots[mode]
+    xs = np.linspace(min(lo for lo, _ in x_ranges), max(hi for _, hi in x_ranges), resolution)
+    return xs, np.linspace(y_lo, y_hi, resolution)
+
+
+def frame_key(design, mode):
+    # normalised design without the inputs the heatmap varies itself, or the length
+    tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing, length = design
+    key = list(design_key(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing))
+    if mode == "bundle":
+        key[4] = key[5] = None
+    else:
+        points = list(key[2])
+        points[mode] = None
+        key[2] = tuple(points)
+    return tuple(key) + (mode,)
+
+
+def evaluate_tile(design, mode, xs, ys):
+    # every metric per km over the xs * ys pixels of one tile in a single batch, arrays of shape (len(ys), len(xs))
+    tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing, length = design
+    X, Y = np.meshgrid(xs, ys)
+    n_pixels = X.size
+    coordinates = np.repeat(np.asarray(coordinates, dtype=float)[None, :3 * num_circuits], n_pixels, axis=0)
+    if mode == "bundle":
+        spacing = X.ravel()
+        conductor_type = np.array(list(conductor_specs))[Y.ravel().astype(int)]
+    else:
+        coordinates[:, mode, 0] = X.ravel()
+        coordinates[:, mode, 1] = Y.ravel()
+    # pixels outside the tower limits come back as NaN with the coordinates error
+    result = calculate_parameters_batch(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing, 1.0)
+    return {key: result[key].reshape(X.shape) for key in metrics}
+
+
+def marker(design, mode):
+    # where the design itself sits on the heatmap axes
+    if mode == "bundle":
+        return float(design[5]), list(conductor_specs).index(design[4])
+    return tuple(float(v) for v in design[2][mode])
+
+
+def frame(design, mode, resolution=128):
+    # all tiles of the heatmap as a list of (row, column, key, values); unchanged tiles come from the cache
+    # so moving the varied phase (or bundle) itself only moves the marker
+    xs, ys = axes(design, mode, resolution)
+    base = frame_key(design, mode)
+    length = design[6]
+    tiles = []
+    for row in range(0, len(ys), tile_size):
+        for column in range(0, len(xs), tile_size):
+            key = base + (len(xs), len(ys), row, column)
+            tile_xs, tile_ys = xs[column:column + tile_size], ys[row:row + tile_size]
+            per_km = tile_cache.get(key, lambda: evaluate_tile(design, mode, tile_xs, tile_ys))
+            values = {name: tile * length if name in per_km_metrics else tile for name, tile in per_km.items()}
+            tiles.append((row, column, key + (length,), values))
+    return {"xs": xs, "ys": ys, "tiles": tiles, "marker": marker(design, mode)}
+
+
+def colorize(values, lo, hi):
+    # (h, w) values -> (h, w, 3) uint8 colours between lo and hi
+    scaled = np.clip((values - lo) / (hi - lo if hi > lo else 1.0), 0, 1) * (len(ramp) - 1)
+    index = np.minimum(np.nan_to_num(scaled).astype(int), len(ramp) - 2)
+    weight = (np.nan_to_num(scaled) - index)[..., None]
+    rgb = (ramp[index] * (1 - weight) + ramp[index + 1] * weight).astype(np.uint8)
+    rgb[np.isnan(values)] = nan_color
+    return rgb
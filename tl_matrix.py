@@ -0,0 +1,127 @@
+import math
+import numpy as np
+
+from tl_specs import conductor_specs, conductors, eps0, mu0
+from tl_batch import lookup
+from tl_bundle import bundle_log_distances
+from tl_resistance import ac_resistance
+
+
+a = np.exp(2j * math.pi / 3)
+A = np.array([[1, 1, 1], [1, a**2, a], [1, a, a**2]])
+
+
+def log_center_distances(positions):
+    diff = positions[:, :, None, :] - positions[:, None, :, :]
+    with np.errstate(divide="ignore"):
+        return np.log(np.sqrt((diff**2).sum(axis=-1)))
+
+
+def with_diagonal(log_d, log_self):
+    # log distance matrix with the conductor's own GMR (or radius) on the diagonal
+    out = log_d.copy()
+    k = out.shape[-1]
+    out[:, np.arange(k), np.arange(k)] = log_self
+    return out
+
+
+def impedance_matrix(log_d, log_gmr, resistance, frequency=50.0, earth_resistivity=100.0):
+    # Series impedance matrix (N, K, K) in Ω/km from Carson's equations with the earth return
+    # approximated by the first correction terms. log_d (N, K, K) log distances between conductors,
+    # log_gmr (N, K) log GMR in m, resistance (N, K) in Ω/km.
+    frequency = np.asarray(frequency, dtype=float).reshape(-1, 1, 1)
+    omega = 2 * math.pi * frequency
+    log_de = np.log(658.5 * np.sqrt(earth_resistivity / frequency))  # depth of the earth return
+    Z = mu0 * omega / 8 + 1j * mu0 * omega / (2 * math.pi) * (log_de - with_diagonal(log_d, log_gmr))
+    k = Z.shape[-1]
+    Z[:, np.arange(k), np.arange(k)] += np.asarray(resistance) / 1000
+    return Z * 1000
+
+
+def potential_matrix(positions, log_d, log_radius):
+    # Maxwell potential coefficients (N, K, K) in km/µF with every conductor imaged below ground,
+    # distances to images are taken between bundle centres
+    image = positions * np.array([1, -1])
+    diff = positions[:, :, None, :] - image[:, None, :, :]
+    log_image = np.log(np.sqrt((diff**2).sum(axis=-1)))
+    P = (log_image - with_diagonal(log_d, log_radius)) / (2 * math.pi * eps0)  # m/F
+    return P * 1e-9
+
+
+def phase_voltages(voltage, num_phases):
+    # (N, P) rms phase to ground voltage phasors (V) in a, b, c order from line to line voltages (N,)
+    return np.asarray(voltage, dtype=float)[:, None] / math.sqrt(3) * np.tile(A[1], num_phases // 3)
+
+
+def phase_charges(coordinates, num_conductors, radius, spacing, voltage):
+    # (N, P) charge phasors (C/m) of the phase bundles at the voltages (N, P) from the potential coefficients
+    # with ground images, radius (N,) of one sub-conductor in m. Also returns the bundle log distances and
+    # the log equivalent bundle radius (N,) they were built from.
+    log_d, log_bundle = bundle_log_distances(coordinates, num_conductors, spacing)
+    log_req = np.log(radius) / num_conductors + log_bundle
+    P = potential_matrix(coordinates, log_d, np.repeat(log_req[:, None], coordinates.shape[1], axis=1)) * 1e9  # m/F
+    return np.linalg.solve(P, voltage[..., None])[..., 0], log_d, log_req
+
+
+def kron_reduce(matrix, num_kept):
+    # eliminate the conductors after the first num_kept (grounded shield wires)
+    pp = matrix[:, :num_kept, :num_kept]
+    ps = matrix[:, :num_kept, num_kept:]
+    sp = matrix[:, num_kept:, :num_kept]
+    ss = matrix[:, num_kept:, num_kept:]
+    if ss.shape[-1] == 0:
+        return pp
+    return pp - ps @ np.linalg.solve(ss, sp)
+
+
+def sequence_components(matrix):
+    # symmetrical components of a 3 or 6 phase matrix, circuit by circuit
+    k = matrix.shape[-1]
+    T = np.kron(np.eye(k // 3), A)
+    return np.linalg.solve(T, matrix @ T)
+
+
+def phase_matrices(coordinates, num_conductors, conductor_type, distance_between_conductors, frequency=50.0,
+                   earth_resistivity=100.0, shield_coordinates=None, shield_type="Hawk", temperature=None):
+    # Phase impedance and capacitance matrices of N designs with bundles and optional shield wires.
+    # coordinates (N, 3 or 6, 2) phase bundle centres, shield_coordinates (N, S, 2) single shield conductors.
+    # With a conductor temperature (°C) the phase resistance is the AC value at that temperature and frequency.
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows, num_phases = coordinates.shape[:2]
+    num_conductors = np.broadcast_to(np.asarray(num_conductors), (n_rows,))
+    conductor_type = np.broadcast_to(np.asarray(conductor_type), (n_rows,))
+
+    log_d, log_bundle = bundle_log_distances(coordinates, num_conductors, distance_between_conductors)
+    gmr = lookup(conductor_type, conductors, "GMR")
+    diameter = lookup(conductor_type, conductors, "diameter")
+    if temperature is None:
+        resistance = lookup(conductor_type, conductors, "R")
+    else:
+        resistance = ac_resistance(conductor_type, temperature, frequency)
+    log_gmr = np.repeat((np.log(1e-3 * gmr) / num_conductors + log_bundle)[:, None], num_phases, axis=1)
+    log_radius = np.repeat((np.log(1e-3 * diameter / 2) / num_conductors + log_bundle)[:, None], num_phases, axis=1)
+    resistance = np.repeat((resistance / num_conductors)[:, None], num_phases, axis=1)
+
+    positions = coordinates
+    if shield_coordinates is not None:
+        shield_coordinates = np.broadcast_to(np.asarray(shield_coordinates, dtype=float), (n_rows,) + np.shape(shield_coordinates)[-2:])
+        num_shields = shield_coordinates.shape[1]
+        shield_spec = conductor_specs[shield_type]
+        positions = np.concatenate([coordinates, shield_coordinates], axis=1)
+        phase_log_d = log_d
+        log_d = log_center_distances(positions)
+        log_d[:, :num_phases, :num_phases] = phase_log_d
+        log_gmr = np.concatenate([log_gmr, np.full((n_rows, num_shields), math.log(1e-3 * shield_spec["GMR"]))], axis=1)
+        log_radius = np.concatenate([log_radius, np.full((n_rows, num_shields), math.log(1e-3 * shield_spec["diameter"] / 2))], axis=1)
+        resistance = np.concatenate([resistance, np.full((n_rows, num_shields), shield_spec["R"])], axis=1)
+
+    Z = kron_reduce(impedance_matrix(log_d, log_gmr, resistance, frequency, earth_resistivity), num_phases)
+    P = kron_reduce(potential_matrix(positions, log_d, log_radius), num_phases)
+    C = np.linalg.inv(P)
+    return {
+        "Z (Ω/km)": Z,
+        "P (km/µF)": P,
+        "C (µF/km)": C,
+        "Z012 (Ω/km)": sequence_components(Z),
+        "C012 (µF/km)": sequence_components(C),
+    }
@@ -0,0 +1,116 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tl_specs import conductors, towers
+from tl_batch import ERR_CIRCUITS, design_errors, error_message, line_constants, lookup
+
+
+# default spreads, one standard deviation
+sigma_x = 0.05  # m, tower placement and cross arm tolerance
+sigma_y = 0.3  # m, sag and terrain
+gmr_tolerance = 0.01  # relative, conductor manufacturing
+resistance_tolerance = 0.02  # relative
+chunk_size = 65536  # samples drawn from one RNG stream, the unit of work of a process
+result_keys = ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)")
+
+
+def sample_chunk(design, count, seed, spreads):
+    # R, L, C (for the design length) and capacity of `count` perturbed copies of one design drawn from
+    # the RNG stream of `seed` (a SeedSequence), every copy is one row of the batch engine
+    tower_type, coordinates, num_conductors, conductor_type, spacing, length = design
+    x_sigma, y_sigma, gmr_sigma, r_sigma = spreads
+    rng = np.random.default_rng(seed)
+    coordinates = np.asarray(coordinates, dtype=float)
+    num_phases = len(coordinates)
+    noise = rng.standard_normal((count, num_phases, 2)) * np.array([x_sigma, y_sigma])
+    gmr = lookup([conductor_type], conductors, "GMR")[0] * (1 + gmr_sigma * rng.standard_normal(count))
+    resistance = lookup([conductor_type], conductors, "R")[0] * (1 + r_sigma * rng.standard_normal(count))
+    full = lambda v: np.full(count, v)
+    R, L, C, capacity = line_constants(
+        coordinates + noise, full(num_phases // 3), full(num_conductors), full(spacing), gmr,
+        full(lookup([conductor_type], conductors, "diameter")[0]), resistance,
+        full(lookup([conductor_type], conductors, "I")[0]), full(lookup([tower_type], towers, "voltage")[0]))
+    return np.stack([R * length, L * length, C * length, capacity])
+
+
+def monte_carlo(tower_type, coordinates, num_conductors, conductor_type, distance_between_conductors, length,
+                samples=100000, seed=0, workers=1, x_sigma=sigma_x, y_sigma=sigma_y,
+                gmr_sigma=gmr_tolerance, r_sigma=resistance_tolerance, chunk_size=chunk_size):
+    # Perturbed samples of one design, returns {key: (samples,)} for the result_keys.
+    # Samples are drawn in chunks, each from its own stream spawned from SeedSequence(seed), so the
+    # result depends only on the seed and chunk_size, never on the number of worker processes.
+    if samples < 1:
+        raise ValueError("Number of samples must be at least 1")
+    coordinates = np.asarray(coordinates, dtype=float)
+    num_circuits = len(coordinates) // 3
+    error = design_errors(np.array([tower_type]), np.array([num_circuits]), coordinates[None],
+                          np.array([num_conductors]), np.array([conductor_type]), np.array([distance_between_conductors]))[0]
+    if error or len(coordinates) not in (3, 6):
+        raise ValueError(error_message(error or ERR_CIRCUITS, (tower_type, num_circuits, coordinates)))
+
+    design = (tower_type, coordinates, num_conductors, conductor_type, distance_between_conductors, length)
+    spreads = (x_sigma, y_sigma, gmr_sigma, r_sigma)
+    counts = [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    jobs = ([design] * len(counts), counts, seeds, [spreads] * len(counts))
+    if workers > 1 and len(counts) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(sample_chunk, *jobs))
+    else:
+        chunks = list(map(sample_chunk, *jobs))
+    values = np.concatenate(chunks, axis=1)
+    return dict(zip(result_keys, values))
+
+
+def summarize(samples, percentiles=(1, 5, 50, 95, 99)):
+    # mean, standard deviation and percentiles of every sampled quantity
+    summary = {}
+    for key, values in samples.items():
+        row = {"mean": values.mean(), "std": values.std()}
+        row.update((f"p{p}", v) for p, v in zip(percentiles, np.percentile(values, percentiles)))
+        summary[key] = row
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo spread of the parameters of one design")
+    parser.add_argument("tower_type", choices=list(towers))
+    parser.add_argument("conductor_type", choices=list(conductors))
+    parser.add_argument("num_conductors", type=int)
+    parser.add_argument("coordinates", nargs="+", help="phase positions as x,y (3 or 6 of them, put -- before them when an x is negative)")
+    parser.add_argument("--spacing", type=float, default=0.4, help="distance between conductors in the bundle (m)")
+    parser.add_argument("--length", type=float, default=100.0, help="km")
+    parser.add_argument("--samples", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sigma-x", type=float, default=sigma_x, help="m")
+    parser.add_argument("--sigma-y", type=float, default=sigma_y, help="m")
+    parser.add_argument("--gmr-tolerance", type=float, default=gmr_tolerance, help="relative standard deviation")
+    parser.add_argument("--resistance-tolerance", type=float, default=resistance_tolerance, help="relative standard deviation")
+    parser.add_argument("-o", "--output", help="save the samples to this .npz file")
+    args = parser.parse_args(argv)
+
+    coordinates = [[float(v) for v in point.split(",")] for point in args.coordinates]
+    start = time.perf_counter()
+    try:
+        samples = monte_carlo(args.tower_type, coordinates, args.num_conductors, args.conductor_type, args.spacing, args.length,
+                              args.samples, args.seed, args.workers, args.sigma_x, args.sigma_y, args.gmr_tolerance, args.resistance_tolerance)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+    summary = summarize(samples)
+    columns = list(next(iter(summary.values())))
+    print(f"{args.samples} samples in {elapsed:.2f} s")
+    print(f"{'':16}" + "".join(f"{name:>12}" for name in columns))
+    for key, row in summary.items():
+        print(f"{key:16}" + "".join(f"{row[name]:12.6g}" for name in columns))
+    if args.output:
+        np.savez(args.output, **samples)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
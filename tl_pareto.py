@@ -0,0 +1,246 @@
+import argparse
+import heapq
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from tl_specs import conductor_specs, tower_types
+from tl_batch import ERR_BUNDLE, ERR_BUNDLE_MIN, ERR_SPACING, constants_from_log_distances, error_message
+from tl_bundle import bundle_log_distances
+from tl_constraints import phase_ranges, tower_circuits
+
+
+def symmetries(num_circuits):
+    # (perm, mirror) pairs that leave L, C and capacity unchanged, the layout becomes coordinates[perm]
+    # with x negated when mirror: renaming the phases a, b, c (in both circuits alike), swapping a phase
+    # with its parallel phase a' and mirroring the tower (x -> -x)
+    found = []
+    for names in itertools.permutations(range(3)):
+        for swaps in itertools.product((0, 1), repeat=3 if num_circuits == 2 else 0):
+            perm = [names[p] for p in range(3)]
+            if num_circuits == 2:
+                perm = [3 * (c ^ swaps[p]) + names[p] for c in range(2) for p in range(3)]
+            for mirror in (False, True):
+                found.append((np.array(perm), mirror))
+    return found
+
+
+def transform(lo, hi, perm, mirror):
+    # image of the box under one of the symmetries
+    lo, hi = lo[perm].copy(), hi[perm].copy()
+    if mirror:
+        lo[:, 0], hi[:, 0] = -hi[:, 0], -lo[:, 0].copy()
+    return lo, hi
+
+
+def box_key(lo, hi):
+    return tuple(np.concatenate([lo, hi]).ravel().round(9))
+
+
+def root_boxes(tower_type):
+    # one box per combination of tower sides. Boxes that are images of each other under the symmetries
+    # hold layouts with the same objectives, so only one of them is searched. Returns (lo, hi, order):
+    # a box that maps onto itself still holds every layout several times over, of those only the one
+    # with the lexicographically smallest phase heights is kept, order[i, j] marks the boxes without
+    # it as every layout with y_i > y_j
+    slots = phase_ranges(tower_type)
+    heights = [y for _, y in slots]
+    boxes = {}
+    for choice in itertools.product(*[x_ranges for x_ranges, _ in slots]):
+        lo = np.array([(x[0], y[0]) for x, y in zip(choice, heights)], dtype=float)
+        hi = np.array([(x[1], y[1]) for x, y in zip(choice, heights)], dtype=float)
+        boxes[box_key(lo, hi)] = (lo, hi)
+
+    roots = []
+    num_phases = len(slots)
+    for key, (lo, hi) in boxes.items():
+        images = [(perm, box_key(*transform(lo, hi, perm, mirror))) for perm, mirror in symmetries(num_phases // 3)]
+        if key != max(image for _, image in images if image in boxes):
+            continue
+        order = np.zeros((num_phases, num_phases), dtype=bool)
+        for perm, image in images:
+            moved = np.flatnonzero(perm != np.arange(num_phases))
+            if image == key and len(moved):
+                # the first height the symmetry changes must not exceed the one it is swapped with
+                order[moved[0], perm[moved[0]]] = True
+        roots.append((lo, hi, order))
+    return roots
+
+
+def distance_bounds(lo, hi):
+    # smallest and largest distance between every pair of phase boxes, shape (B, P, P)
+    gap = np.maximum(0, np.maximum(lo[:, None] - hi[:, :, None], lo[:, :, None] - hi[:, None]))
+    span = np.maximum(hi[:, None] - lo[:, :, None], hi[:, :, None] - lo[:, None])
+    return np.sqrt((gap**2).sum(axis=-1)), np.sqrt((span**2).sum(axis=-1))
+
+
+def dominated(points, front):
+    # rows of points that some front row is at least as good as in every objective
+    if len(front) == 0:
+        return np.zeros(len(points), dtype=bool)
+    return (front[None, :, :] <= points[:, None, :]).all(axis=-1).any(axis=1)
+
+
+def pareto_filter(objectives):
+    # indices of the non-dominated rows (all objectives minimised)
+    better_eq = (objectives[None, :, :] <= objectives[:, None, :]).all(axis=-1)
+    strictly = (objectives[None, :, :] < objectives[:, None, :]).any(axis=-1)
+    dominated_by = better_eq & strictly
+    keep = ~dominated_by.any(axis=1)
+    # drop exact duplicates, keep the first
+    _, first = np.unique(objectives[keep], axis=0, return_index=True)
+    return np.flatnonzero(keep)[np.sort(first)]
+
+
+def optimize(tower_type, conductor_type, num_conductors, distance_between_conductors=0.4, length=1.0,
+             min_clearance=1.0, resolution=0.05, max_evals=100000, time_limit=None, batch_size=256):
+    # Branch and bound search of the tower coordinate box for layouts trading off
+    # L (min), C (max) and capacity (max). Returns the Pareto set with search statistics.
+    # Layouts equal up to renaming phases or mirroring are searched once (see root_boxes). The bound
+    # is loose for two circuits, where the a-a' pairs span the whole tower until the boxes are very
+    # small, so 2-circuit towers rely mostly on the symmetry and on max_evals and time_limit.
+    start_time = time.perf_counter()
+    tower_spec = tower_types[tower_type]
+    conductor_spec = conductor_specs[conductor_type]
+    if num_conductors < 1:
+        raise ValueError(error_message(ERR_BUNDLE_MIN, (tower_type,)))
+    if num_conductors > tower_spec["max_bundle"]:
+        raise ValueError(error_message(ERR_BUNDLE, (tower_type,)))
+    if num_conductors > 1 and not distance_between_conductors > 0:
+        raise ValueError(error_message(ERR_SPACING, (tower_type,)))
+    num_circuits = tower_circuits[tower_type]
+    num_phases = 3 * num_circuits
+
+    # within-bundle part of the GMR is the same for every layout
+    _, log_bundle = bundle_log_distances(np.zeros((1, 1, 2)), num_conductors, distance_between_conductors)
+    # every sub-conductor lies within this radius of its phase centre
+    bundle_radius = distance_between_conductors / (2 * np.sin(np.pi / num_conductors)) if num_conductors > 1 else 0.0
+
+    def constants(log_d):
+        n = len(log_d)
+        R, L, C, capacity = constants_from_log_distances(
+            log_d, np.full(n, log_bundle[0]), np.full(n, num_circuits), np.full(n, num_conductors),
+            conductor_spec["GMR"], conductor_spec["diameter"], conductor_spec["R"], conductor_spec["I"], tower_spec["voltage"])
+        return np.column_stack([L * length, -C * length, -capacity])
+
+    off_diagonal = ~np.eye(num_phases, dtype=bool)
+    same_phase = np.zeros((num_phases, num_phases), dtype=bool)
+    if num_circuits == 2:
+        same_phase[[0, 1, 2, 3, 4, 5], [3, 4, 5, 0, 1, 2]] = True
+
+    def optimistic(lo, hi):
+        # best objectives any layout in the boxes can reach: phases of different names as close
+        # as possible, the parallel a-a' pairs as far apart as possible. Every sub-conductor distance
+        # is within two bundle radii of the centre distance, so the bundle to bundle GMD is too.
+        d_min, d_max = distance_bounds(lo, hi)
+        near = np.maximum(np.maximum(d_min, min_clearance) - 2 * bundle_radius, 1e-3)
+        d = np.where(same_phase, d_max + 2 * bundle_radius, near)
+        with np.errstate(divide="ignore"):
+            return constants(np.log(d)), d_max[:, off_diagonal].min(axis=1) >= min_clearance
+
+    counter = itertools.count()
+    queue = []
+    roots = root_boxes(tower_type)
+    order = np.array([root_order for _, _, root_order in roots])
+    for root, (lo, hi, _) in enumerate(roots):
+        heapq.heappush(queue, (-np.inf, next(counter), lo, hi, root))
+
+    front = np.empty((0, 3))
+    front_coordinates = np.empty((0, num_phases, 2))
+    evaluations = pruned = symmetric = 0
+    finished = False
+    while True:
+        if not queue:
+            finished = True
+            break
+        if evaluations >= max_evals or (time_limit is not None and time.perf_counter() - start_time > time_limit):
+            break
+        items = [heapq.heappop(queue) for _ in range(min(batch_size, len(queue), max_evals - evaluations))]
+        lo = np.array([item[2] for item in items])
+        hi = np.array([item[3] for item in items])
+        root = np.array([item[4] for item in items])
+
+        # evaluate the box centres that respect the phase clearance
+        centers = (lo + hi) / 2
+        diff = centers[:, :, None] - centers[:, None]
+        dist = np.sqrt((diff**2).sum(axis=-1))
+        feasible = dist[:, off_diagonal].min(axis=1) >= min_clearance
+        evaluations += len(items)
+        if feasible.any():
+            log_d, _ = bundle_log_distances(centers[feasible], num_conductors, distance_between_conductors)
+            objectives = constants(log_d)
+            front = np.concatenate([front, objectives])
+            front_coordinates = np.concatenate([front_coordinates, centers[feasible]])
+            keep = pareto_filter(front)
+            front, front_coordinates = front[keep], front_coordinates[keep]
+
+        # split every box in half along its widest coordinate, boxes already at resolution are done
+        width = (hi - lo).reshape(len(items), -1)
+        axis = width.argmax(axis=1)
+        splittable = width[np.arange(len(items)), axis] > resolution
+        lo, hi, axis, root = lo[splittable], hi[splittable], axis[splittable], root[splittable]
+        if len(lo) == 0:
+            continue
+        rows = np.arange(len(lo))
+        mid = (lo.reshape(len(lo), -1)[rows, axis] + hi.reshape(len(hi), -1)[rows, axis]) / 2
+        left_hi = hi.reshape(len(hi), -1).copy()
+        left_hi[rows, axis] = mid
+        right_lo = lo.reshape(len(lo), -1).copy()
+        right_lo[rows, axis] = mid
+        child_lo = np.concatenate([lo, right_lo.reshape(lo.shape)])
+        child_hi = np.concatenate([left_hi.reshape(hi.shape), hi])
+        child_root = np.concatenate([root, root])
+
+        # drop children holding only symmetric copies of layouts searched elsewhere
+        copies = (order[child_root] & (child_lo[:, :, None, 1] > child_hi[:, None, :, 1])).any(axis=(1, 2))
+        symmetric += int(copies.sum())
+        child_lo, child_hi, child_root = child_lo[~copies], child_hi[~copies], child_root[~copies]
+
+        # drop children that cannot improve on the current front or cannot hold the clearance
+        bound, possible = optimistic(child_lo, child_hi)
+        alive = possible & ~dominated(bound, front)
+        pruned += int((~alive).sum())
+        for b, l, h, r in zip(bound[alive], child_lo[alive], child_hi[alive], child_root[alive]):
+            heapq.heappush(queue, (b[0], next(counter), l, h, r))
+
+    return {
+        "coordinates": front_coordinates,
+        "L (mH)": front[:, 0],
+        "C (µF)": -front[:, 1],
+        "Capacity (MVA)": -front[:, 2],
+        "evaluations": evaluations,
+        "pruned": pruned,
+        "symmetric": symmetric,
+        "finished": finished,
+        "elapsed (s)": time.perf_counter() - start_time,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pareto front of L, C and capacity over a tower's coordinate box")
+    parser.add_argument("tower_type", choices=list(tower_types))
+    parser.add_argument("conductor_type", choices=list(conductor_specs))
+    parser.add_argument("num_conductors", type=int)
+    parser.add_argument("--spacing", type=float, default=0.4, help="distance between conductors in the bundle (m)")
+    parser.add_argument("--length", type=float, default=1.0, help="line length (km)")
+    parser.add_argument("--clearance", type=float, default=1.0, help="minimum distance between phases (m)")
+    parser.add_argument("--resolution", type=float, default=0.05, help="stop splitting boxes below this width (m)")
+    parser.add_argument("--max-evals", type=int, default=100000)
+    parser.add_argument("--time-limit", type=float, default=None, help="wall-clock limit (s)")
+    args = parser.parse_args(argv)
+    try:
+        result = optimize(args.tower_type, args.conductor_type, args.num_conductors, args.spacing, args.length,
+                          args.clearance, args.resolution, args.max_evals, args.time_limit)
+    except ValueError as e:
+        parser.error(str(e))
+    for coordinates, L, C, capacity in zip(result["coordinates"], result["L (mH)"], result["C (µF)"], result["Capacity (MVA)"]):
+        print(f"L={L:.4f} mH  C={C:.5f} µF  Capacity={capacity:.1f} MVA  {coordinates.round(3).tolist()}")
+    status = "finished" if result["finished"] else "stopped on budget"
+    print(f"{result['evaluations']} evaluations, {result['pruned']} boxes pruned, {result['symmetric']} symmetric copies dropped, "
+          f"{status} in {result['elapsed (s)']:.2f} s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import sys
+import time
+
+
+# Opt-in stage timing. Code marks its stages with `with stage("batch.gmd", rows):`, which returns a
+# shared do-nothing context while the collector is off, so the hooks cost one function call each.
+# TL_PROFILE=run.json in the environment turns the collector on at import and writes the JSON and
+# run.pstats at exit, e.g. for the GUI.
+enabled = False
+stats = {}  # stage -> [calls, seconds, rows]
+_disabled = contextlib.nullcontext()
+
+
+class Timer:
+    __slots__ = ("name", "rows", "start")
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+def stage(name, rows=1):
+    if not enabled:
+        return _disabled
+    return Timer(name, rows)
+
+
+def record(name, seconds, rows=1):
+    entry = stats.get(name)
+    if entry is None:
+        stats[name] = [1, seconds, rows]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += rows
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+
+def disable():
+    enable(False)
+
+
+def reset():
+    stats.clear()
+
+
+def snapshot():
+    return {name: list(entry) for name, entry in stats.items()}
+
+
+def merge(other):
+    # add the stage totals of another process (a snapshot) into this collector
+    for name, (calls, seconds, rows) in other.items():
+        entry = stats.setdefault(name, [0, 0.0, 0])
+        entry[0] += calls
+        entry[1] += seconds
+        entry[2] += rows
+
+
+def report():
+    # {stage: {calls, seconds, rows, per call and per row times}}, slowest stage first
+    out = {}
+    for name, (calls, seconds, rows) in sorted(stats.items(), key=lambda item: -item[1][1]):
+        out[name] = {"calls": calls, "seconds": seconds, "rows": rows, "mean batch": rows / calls,
+                     "µs per call": 1e6 * seconds / calls, "µs per row": 1e6 * seconds / rows if rows else None}
+    return out
+
+
+def write_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"stages": report()}, f, indent=1, ensure_ascii=False)
+
+
+def write_pstats(path):
+    # stage totals in the marshalled format of cProfile dump_stats, readable by pstats.Stats(path)
+    # and profile viewers, each stage shows up as a function of the "tl_profile" file
+    import marshal
+    data = {("tl_profile", 0, name): (calls, calls, seconds, seconds, {}) for name, (calls, seconds, _) in stats.items()}
+    with open(path, "wb") as f:
+        marshal.dump(data, f)
+
+
+def print_report(file=sys.stderr):
+    print(f"{'stage':28}{'calls':>10}{'rows':>12}{'seconds':>10}{'µs/row':>10}", file=file)
+    for name, entry in report().items():
+        per_row = f"{entry['µs per row']:10.3f}" if entry["µs per row"] is not None else f"{'':10}"
+        print(f"{name:28}{entry['calls']:10d}{entry['rows']:12d}{entry['seconds']:10.4f}{per_row}", file=file)
+
+
+def write_at_exit(path):
+    def write():
+        write_json(path)
+        write_pstats(os.path.splitext(path)[0] + ".pstats")
+    atexit.register(write)
+
+
+if os.environ.get("TL_PROFILE"):
+    enable()
+    write_at_exit(os.environ["TL_PROFILE"])
+
+
+def main(argv=None):
+    # run another tool with the collector on: python tl_profile.py -o prof.json tl_sweep.py Type-1 --step 1
+    parser = argparse.ArgumentParser(description="Run a tool with stage timing and write the profile")
+    parser.add_argument("-o", "--output", default="profile.json", help="stage timings as JSON, plus a .pstats file next to it")
+    parser.add_argument("--cprofile", help="also write a full cProfile of the run to this file")
+    parser.add_argument("script", help="Python tool to run, such as tl_sweep.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    import cProfile
+    import runpy
+    import tl_profile  # the collector the tools import, not this __main__ copy
+    tl_profile.enable()
+    sys.argv = [args.script] + args.args
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        profiler.enable()
+    try:
+        runpy.run_path(args.script, run_name="__main__")
+    except SystemExit:
+        pass
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        tl_profile.write_json(args.output)
+        tl_profile.write_pstats(os.path.splitext(args.output)[0] + ".pstats")
+        tl_profile.print_report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import csv
+import math
+import sys
+import time
+
+import numpy as np
+
+from tl_specs import conductors, towers
+from tl_batch import lookup
+
+
+# IEEE 738 steady state heat balance defaults
+max_temperature = 75.0  # °C allowed conductor temperature
+emissivity = 0.5
+absorptivity = 0.5
+resistance_coefficient = 0.00403  # 1/°C of aluminium
+reference_temperature = 20.0  # °C of the catalog R
+max_chunk_entries = 2**20  # timesteps * lines evaluated at once
+
+weather_columns = ("ambient", "wind_speed", "wind_direction", "solar")
+
+
+def air_properties(film, elevation):
+    # dynamic viscosity (Pa·s), density (kg/m³) and thermal conductivity (W/m·°C) of air at the film temperature
+    viscosity = 1.458e-6 * (film + 273) ** 1.5 / (film + 383.4)
+    density = (1.293 - 1.525e-4 * elevation + 6.379e-9 * elevation**2) / (1 + 0.00367 * film)
+    conductivity = 2.424e-2 + 7.477e-5 * film - 4.407e-9 * film**2
+    return viscosity, density, conductivity
+
+
+def convective_loss(diameter, conductor_temperature, ambient, wind_speed, wind_angle, elevation=0.0):
+    # W/m, the larger of the low and high wind forced convection and natural convection
+    # diameter in m, wind_angle in radians between the wind and the conductor axis
+    rise = conductor_temperature - ambient
+    viscosity, density, conductivity = air_properties((conductor_temperature + ambient) / 2, elevation)
+    reynolds = diameter * density * wind_speed / viscosity
+    k_angle = 1.194 - np.cos(wind_angle) + 0.194 * np.cos(2 * wind_angle) + 0.368 * np.sin(2 * wind_angle)
+    forced_low = k_angle * (1.01 + 1.35 * reynolds**0.52) * conductivity * rise
+    forced_high = k_angle * 0.754 * reynolds**0.6 * conductivity * rise
+    natural = 3.645 * np.sqrt(density) * diameter**0.75 * np.maximum(rise, 0) ** 1.25
+    return np.maximum(np.maximum(forced_low, forced_high), natural)
+
+
+def radiated_loss(diameter, conductor_temperature, ambient, emissivity=emissivity):
+    # W/m
+    return 17.8 * diameter * emissivity * (((conductor_temperature + 273) / 100) ** 4 - ((ambient + 273) / 100) ** 4)
+
+
+def solar_gain(diameter, solar, absorptivity=absorptivity):
+    # W/m from the solar radiation (W/m²) reaching the conductor
+    return absorptivity * solar * diameter
+
+
+def conductor_resistance(resistance, temperature):
+    # Ω/m at the conductor temperature from the catalog Ω/km at the reference temperature
+    return resistance / 1000 * (1 + resistance_coefficient * (temperature - reference_temperature))
+
+
+def ampacity(conductor_type, ambient, wind_speed, wind_direction, solar, line_azimuth=0.0,
+             max_temperature=max_temperature, elevation=0.0, emissivity=emissivity, absorptivity=absorptivity):
+    # Steady state ampacity (A) per conductor for T timesteps of L lines, returns (T, L).
+    # Weather columns are (T,) shared by every line or (T, L); conductor_type, line_azimuth (degrees
+    # from north), max_temperature and elevation are per line (L,) or scalars.
+    # Wind direction is in degrees from north, temperatures in °C, wind speed in m/s, solar in W/m².
+    conductor_type = np.atleast_1d(conductor_type)
+    num_lines = len(conductor_type)
+    diameter = lookup(conductor_type, conductors, "diameter") * 1e-3
+    resistance = lookup(conductor_type, conductors, "R")
+    line = lambda v: np.broadcast_to(np.asarray(v, dtype=float), (num_lines,))
+    line_azimuth, max_temperature, elevation = line(line_azimuth), line(max_temperature), line(elevation)
+    weather = [np.asarray(v, dtype=float) for v in (ambient, wind_speed, wind_direction, solar)]
+    weather = [v[:, None] if v.ndim == 1 else v for v in weather]
+    num_steps = max(len(v) for v in weather)
+    r_max = conductor_resistance(resistance, max_temperature)
+
+    out = np.empty((num_steps, num_lines))
+    block = max(1, max_chunk_entries // num_lines)
+    for start in range(0, num_steps, block):
+        ambient, wind_speed, wind_direction, solar = (v[start:start + block] if len(v) > 1 else v for v in weather)
+        wind_angle = np.arccos(np.abs(np.cos(np.radians(wind_direction - line_azimuth))))  # 0 to 90°
+        losses = (convective_loss(diameter, max_temperature, ambient, wind_speed, wind_angle, elevation)
+                  + radiated_loss(diameter, max_temperature, ambient, emissivity)
+                  - solar_gain(diameter, solar, absorptivity))
+        out[start:start + block] = np.sqrt(np.maximum(losses, 0) / r_max)
+    return out
+
+
+def capacity(ampacity, tower_type, num_conductors, num_circuits=1):
+    # MVA time series (T, L) of lines rated at the given conductor ampacity, like "Capacity (MVA)"
+    voltage = lookup(np.atleast_1d(tower_type), towers, "voltage")
+    return num_circuits * math.sqrt(3) * voltage * ampacity * num_conductors / 1e6
+
+
+def read_weather(path):
+    # weather table with a time column and the weather_columns, returns (times, {column: array})
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    times = [row.get("time", "") for row in rows]
+    return times, {name: np.array([float(row[name]) for row in rows]) for name in weather_columns}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dynamic line rating from a weather time series (IEEE 738 heat balance)")
+    parser.add_argument("weather", help="CSV with time, ambient (°C), wind_speed (m/s), wind_direction (deg), solar (W/m²)")
+    parser.add_argument("-o", "--output", default="rating.csv")
+    parser.add_argument("--conductor", action="append", choices=list(conductors), help="rate these conductors (default all)")
+    parser.add_argument("--tower", default="Type-2", choices=list(towers))
+    parser.add_argument("--bundle", type=int, default=1, help="conductors per bundle")
+    parser.add_argument("--circuits", type=int, default=1)
+    parser.add_argument("--azimuth", type=float, default=0.0, help="line direction (degrees from north)")
+    parser.add_argument("--max-temperature", type=float, default=max_temperature, help="°C")
+    parser.add_argument("--elevation", type=float, default=0.0, help="m above sea level")
+    args = parser.parse_args(argv)
+
+    times, weather = read_weather(args.weather)
+    names = args.conductor or list(conductors)
+    start = time.perf_counter()
+    amps = ampacity(names, *(weather[name] for name in weather_columns), args.azimuth, args.max_temperature, args.elevation)
+    mva = capacity(amps, args.tower, args.bundle, args.circuits)
+    elapsed = time.perf_counter() - start
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time"] + [f"{name} I (A)" for name in names] + [f"{name} Capacity (MVA)" for name in names])
+        writer.writerows([t] + a + m for t, a, m in zip(times, amps.tolist(), mva.tolist()))
+    print(f"{amps.size} ratings in {elapsed:.2f} s, written to {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
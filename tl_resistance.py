@@ -0,0 +1,98 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from tl_specs import conductors, mu0
+from tl_batch import lookup
+from tl_rating import reference_temperature, resistance_coefficient
+
+
+# skin effect tables: AC/DC ratio of every catalog conductor against q = r_outer * sqrt(ω μ0 / ρ),
+# temperature and frequency both only enter through q
+q_range = (1e-2, 1e3)
+table_points = 1024
+table_dir = os.path.dirname(os.path.abspath(__file__))
+_tables = None
+
+
+def tube_skin_ratio(q, core_ratio):
+    # AC/DC resistance ratio of a tubular conductor (the aluminium layers around a steel core carrying no
+    # current) from the Bessel solution of the current density, core_ratio = r_inner / r_outer.
+    # Exponentially scaled Bessel functions keep large q finite.
+    from scipy.special import ive, kve
+    a = np.sqrt(1j) * np.asarray(q, dtype=float)
+    if core_ratio == 0:
+        return (a / 2 * ive(0, a) / ive(1, a)).real
+    b = a * core_ratio
+    s = np.exp(-(a - b) - (a - b).real)  # remaining scale of the K(a) I(b) terms
+    numerator = ive(0, a) * kve(1, b) + kve(0, a) * ive(1, b) * s
+    denominator = ive(1, a) * kve(1, b) - ive(1, b) * kve(1, a) * s
+    return (a * (1 - core_ratio**2) / 2 * numerator / denominator).real
+
+
+def core_ratios(names):
+    outer = lookup(names, conductors, "diameter")
+    core = np.nan_to_num(lookup(names, conductors, "core_diameter"))  # solid conductor when not given
+    return core / outer
+
+
+def table_path(names):
+    # tables are cached per catalog geometry and grid, a catalog edit gives a new file
+    key = json.dumps([names.tolist(), core_ratios(names).tolist(), q_range, table_points])
+    return os.path.join(table_dir, f"tl_resistance.{hashlib.sha1(key.encode()).hexdigest()[:12]}.npz")
+
+
+def build_tables(names):
+    q = np.geomspace(*q_range, table_points)
+    return {"q": q, "names": names, "ratio": np.array([tube_skin_ratio(q, beta) for beta in core_ratios(names)])}
+
+
+def skin_tables():
+    # loaded on first use from the disk cache, built (needs scipy) and saved when missing
+    global _tables
+    if _tables is None:
+        names = np.array(list(conductors))
+        path = table_path(names)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                _tables = dict(data)
+        else:
+            _tables = build_tables(names)
+            try:
+                np.savez(path, **_tables)
+            except OSError:
+                pass
+    return _tables
+
+
+def resistivity(conductor_type, temperature=reference_temperature):
+    # Ω·m of the aluminium layers that reproduces the catalog DC resistance, linear in temperature
+    outer = lookup(conductor_type, conductors, "diameter") * 1e-3 / 2
+    inner = np.nan_to_num(lookup(conductor_type, conductors, "core_diameter")) * 1e-3 / 2
+    rho = lookup(conductor_type, conductors, "R") / 1000 * math.pi * (outer**2 - inner**2)
+    return rho * (1 + resistance_coefficient * (np.asarray(temperature) - reference_temperature))
+
+
+def skin_factor(conductor_type, temperature=reference_temperature, frequency=50.0):
+    # AC/DC resistance ratio, arguments broadcast against each other
+    conductor_type, temperature, frequency = np.broadcast_arrays(np.asarray(conductor_type), np.asarray(temperature, dtype=float),
+                                                                 np.asarray(frequency, dtype=float))
+    outer = lookup(conductor_type, conductors, "diameter") * 1e-3 / 2
+    q = outer * np.sqrt(2 * math.pi * frequency * mu0 / resistivity(conductor_type, temperature))
+    tables = skin_tables()
+    out = np.full(q.shape, np.nan)
+    log_q = np.log(np.clip(q, *q_range))
+    for i, name in enumerate(tables["names"]):
+        rows = conductor_type == name
+        out[rows] = np.interp(log_q[rows], np.log(tables["q"]), tables["ratio"][i])
+    return out
+
+
+def ac_resistance(conductor_type, temperature=reference_temperature, frequency=50.0):
+    # Ω/km of one conductor at the conductor temperature (°C) and frequency (Hz), the catalog R is the
+    # DC value at the reference temperature
+    dc = lookup(np.asarray(conductor_type), conductors, "R") * (1 + resistance_coefficient * (np.asarray(temperature) - reference_temperature))
+    return dc * skin_factor(conductor_type, temperature, frequency)
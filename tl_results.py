@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from tl_specs import conductors, towers
+from tl_batch import error_messages
+
+
+# Compact result records: catalog row codes in place of tower and conductor names, error codes in place
+# of messages and short field names in place of the result keys, 63 bytes a single circuit design.
+field_names = {
+    "R (Ω)": "R",
+    "L (mH)": "L",
+    "C (µF)": "C",
+    "Capacity (MVA)": "capacity",
+    "Max gradient (kV/cm)": "max_gradient",
+    "Corona loss (kW/km)": "corona_loss",
+}
+header_size = 128  # bytes of every .npy header, fixed so it can be rewritten with the final row count
+
+
+def result_dtype(num_phases, extra=()):
+    # structured dtype of one design and its results, extra are further result keys of field_names
+    return np.dtype([("tower", "i2"), ("num_circuits", "u1"), ("conductor", "i2"), ("num_conductors", "u1"),
+                     ("coordinates", "f4", (num_phases, 2))]
+                    + [(field_names[key], "f8") for key in ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)") + tuple(extra)]
+                    + [("error", "i1")])
+
+
+def records(tower_type, num_circuits, coordinates, num_conductors, conductor_type, result, extra=()):
+    # structured array of N designs from batch columns and a calculate_parameters_batch style result,
+    # names become catalog rows (-1 when unknown)
+    coordinates = np.asarray(coordinates)
+    n_rows = len(coordinates)
+    column = lambda v: np.broadcast_to(np.asarray(v), (n_rows,))
+    out = np.empty(n_rows, dtype=result_dtype(coordinates.shape[1], extra))
+    out["tower"] = towers.rows(column(tower_type))
+    out["num_circuits"] = column(num_circuits)
+    out["conductor"] = conductors.rows(column(conductor_type))
+    out["num_conductors"] = column(num_conductors)
+    out["coordinates"] = coordinates
+    for key in ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)") + tuple(extra):
+        out[field_names[key]] = result[key]
+    out["error"] = result["error"] if "error" in result else 0
+    return out
+
+
+def npy_header(dtype, shape):
+    # version 1.0 header padded to header_size bytes
+    text = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(dtype), tuple(shape))
+    if len(text) >= header_size - 10:
+        raise ValueError(f"A {header_size} byte .npy header is too small for {dtype} of shape {tuple(shape)}")
+    text = text.ljust(header_size - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(text)) + text.encode("latin1")
+
+
+def metadata(dtype, rows):
+    return {"rows": rows, "fields": [[name, dtype[name].base.str, list(dtype[name].shape)] for name in dtype.names],
+            "towers": list(towers), "conductors": list(conductors), "errors": list(error_messages),
+            "keys": {field: key for key, field in field_names.items() if field in dtype.names}}
+
+
+class NpyColumnWriter:
+    # a directory with one .npy file per field, rows are appended as raw bytes and the headers get
+    # the final row count at close, so every column can be memory mapped with np.load
+    def __init__(self, path, dtype):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dtype = dtype
+        self.rows = 0
+        self.files = {}
+        for name in dtype.names:
+            f = open(os.path.join(path, f"{name}.npy"), "wb")
+            f.write(npy_header(dtype[name].base, (0,) + dtype[name].shape))
+            self.files[name] = f
+
+    def write(self, chunk):
+        for name, f in self.files.items():
+            f.write(np.ascontiguousarray(chunk[name], dtype=self.dtype[name].base).tobytes())
+        self.rows += len(chunk)
+
+    def close(self):
+        for name, f in self.files.items():
+            f.seek(0)
+            f.write(npy_header(self.dtype[name].base, (self.rows,) + self.dtype[name].shape))
+            f.close()
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata(self.dtype, self.rows), f, ensure_ascii=False)
+
+
+class ParquetColumnWriter:
+    # the same columns as one Parquet file (coordinates as x1, y1, ... columns), needs pyarrow
+    def __init__(self, path, dtype):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.path = path
+        self.dtype = dtype
+        self.rows = 0
+        meta = {b"tl_results": json.dumps(metadata(dtype, None), ensure_ascii=False).encode()}
+        self.schema = pa.schema([pa.field(name, pa.from_numpy_dtype(dtype.base)) for name, dtype in self.flat_fields()], metadata=meta)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def flat_fields(self):
+        for name in self.dtype.names:
+            if name == "coordinates":
+                for i in range(self.dtype[name].shape[0]):
+                    yield from ((f"{axis}{i+1}", self.dtype[name].base) for axis in "xy")
+            else:
+                yield name, self.dtype[name]
+
+    def write(self, chunk):
+        columns = []
+        for name in self.dtype.names:
+            if name == "coordinates":
+                columns += list(chunk[name].reshape(len(chunk), -1).T)
+            else:
+                columns.append(chunk[name])
+        self.writer.write_table(self.pa.Table.from_arrays([self.pa.array(np.ascontiguousarray(c)) for c in columns], schema=self.schema))
+        self.rows += len(chunk)
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, dtype):
+    # .parquet files when pyarrow is installed, otherwise a directory of .npy columns; a .parquet path
+    # without pyarrow becomes a .results directory next to it, the writer's path is the one written
+    if path.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            path = os.path.splitext(path)[0] + ".results"
+            print(f"pyarrow is not installed, writing .npy columns to {path}", file=sys.stderr)
+        else:
+            return ParquetColumnWriter(path, dtype)
+    return NpyColumnWriter(path, dtype)
+
+
+def read_results(path):
+    # ({field: column}, metadata) with .npy columns memory mapped, not read
+    if os.path.isdir(path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name, _, _ in meta["fields"]}
+        return columns, meta
+    import pyarrow.parquet as pq
+    table = pq.read_table(path, memory_map=True)
+    meta = json.loads(table.schema.metadata[b"tl_results"])
+    meta["rows"] = table.num_rows
+    columns = {}
+    for name, _, shape in meta["fields"]:
+        if name == "coordinates":
+            flat = [table.column(f"{axis}{i+1}").to_numpy() for i in range(shape[0]) for axis in "xy"]
+            columns[name] = np.stack(flat, axis=1).reshape(-1, *shape)
+        else:
+            columns[name] = table.column(name).to_numpy()
+    return columns, meta
+
+
+def decode(codes, names):
+    # catalog rows or error codes back to names or messages, "" for -1
+    return np.array(list(names) + [""], dtype=object)[np.asarray(codes)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summary of a compact result store written by tl_sweep")
+    parser.add_argument("path", help="result directory (.results) or .parquet file")
+    parser.add_argument("--head", type=int, default=5, help="rows to print")
+    args = parser.parse_args(argv)
+    columns, meta = read_results(args.path)
+    print(f"{meta['rows']} rows, {sum(c.nbytes for c in columns.values()) / 1e6:.1f} MB")
+    for name, column in columns.items():
+        if column.dtype.kind == "f" and column.ndim == 1 and len(column):
+            print(f"{meta['keys'].get(name, name):22} min {np.nanmin(column):.6g} max {np.nanmax(column):.6g}")
+    head = slice(0, args.head)
+    tower, conductor = decode(columns["tower"][head], meta["towers"]), decode(columns["conductor"][head], meta["conductors"])
+    for i in range(len(tower)):
+        values = " ".join(f"{name}={columns[name][i]:.6g}" for name in meta["keys"])
+        print(tower[i], conductor[i], columns["num_conductors"][i], columns["coordinates"][i].tolist(), values,
+              meta["errors"][columns["error"][i]])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import argparse
+import sys
+
+import numpy as np
+
+from tl_specs import conductors, towers
+from tl_batch import ERR_OK, ERR_SPAN, design_errors, line_constants, lookup
+from tl_cache import LRUCache
+
+
+# stringing condition every state is solved from: horizontal tension as a fraction of the rated
+# tensile strength at the stringing temperature, no wind or ice
+everyday_tension = 0.20
+stringing_temperature = 15.0  # °C
+gravity = 9.80665
+newton_iterations = 50
+sag_cache = LRUCache(65536)  # (conductor, span, temperature, tension, stringing temperature) -> (sag, tension)
+
+
+def min_clearance(voltage):
+    # required ground clearance (m) of a line of the given voltage (V), 6 m plus 1 cm per kV above 33 kV
+    return 6.0 + 0.01 * np.maximum(np.asarray(voltage) / 1e3 - 33, 0)
+
+
+def conductor_length(tension, weight, span):
+    # arc length (m) of a level span catenary, tension horizontal in N, weight in N/m
+    return 2 * tension / weight * np.sinh(weight * span / (2 * tension))
+
+
+def catenary_sag(tension, weight, span):
+    return tension / weight * (np.cosh(weight * span / (2 * tension)) - 1)
+
+
+def solve_tension(conductor_type, span, temperature, tension=everyday_tension, reference_temperature=stringing_temperature):
+    # Horizontal tension (N) after a change of state from the stringing condition, arguments broadcast.
+    # The unstressed conductor length is kept: L(H) = L(H0) (1 + (H - H0) / EA + α (T - T0)),
+    # solved with vectorized Newton steps on the catenary length.
+    conductor_type, span, temperature = np.broadcast_arrays(np.asarray(conductor_type), np.asarray(span, dtype=float),
+                                                            np.asarray(temperature, dtype=float))
+    weight = lookup(conductor_type, conductors, "weight") * gravity / 1000
+    stiffness = lookup(conductor_type, conductors, "modulus") * lookup(conductor_type, conductors, "area") * 1e3  # GPa * mm² -> N
+    expansion = lookup(conductor_type, conductors, "expansion")
+    H0 = tension * lookup(conductor_type, conductors, "rts") * 1e3
+    L0 = conductor_length(H0, weight, span)
+    strain = expansion * (temperature - reference_temperature)
+
+    H = H0.copy()
+    for _ in range(newton_iterations):
+        x = weight * span / (2 * H)
+        f = conductor_length(H, weight, span) - L0 * (1 + (H - H0) / stiffness + strain)
+        df = 2 / weight * np.sinh(x) - span * np.cosh(x) / H - L0 / stiffness
+        step = f / df
+        H = np.maximum(H - step, 0.5 * H)  # keep the tension positive on the first steps of a large change
+        if np.all(np.abs(step) <= 1e-9 * H):
+            break
+    return H
+
+
+def solve_states(states, tension, reference_temperature):
+    # [(sag, tension)] of a list of (conductor, span, temperature) states in one vectorized solve
+    names, spans, temperatures = (np.array(column) for column in zip(*states))
+    H = solve_tension(names, spans, temperatures, tension, reference_temperature)
+    D = catenary_sag(H, lookup(names, conductors, "weight") * gravity / 1000, spans)
+    return list(zip(D.tolist(), H.tolist()))
+
+
+def sag(conductor_type, span, temperature, tension=everyday_tension, reference_temperature=stringing_temperature):
+    # mid-span sag (m) and horizontal tension (N), arguments broadcast. Solutions only depend on the
+    # conductor, span and conditions, never on the line length, so every distinct state is solved once
+    # and kept in sag_cache for later designs, lengths and sweeps.
+    conductor_type, span, temperature = np.broadcast_arrays(np.asarray(conductor_type), np.asarray(span, dtype=float),
+                                                            np.asarray(temperature, dtype=float))
+    if not (span > 0).all():
+        raise ValueError("Span must be positive")
+    # distinct states through one integer code per row, much faster than a row-wise unique
+    columns = [np.unique(v.ravel(), return_inverse=True) for v in (conductor_type, span, temperature)]
+    code = np.zeros(conductor_type.size, dtype=np.int64)
+    for values, index in columns:
+        code = code * len(values) + index.ravel()
+    codes, inverse = np.unique(code, return_inverse=True)
+    unique = []
+    for c in codes.tolist():
+        state = []
+        for values, _ in reversed(columns):
+            c, i = divmod(c, len(values))
+            state.append(values[i].item())
+        unique.append(tuple(reversed(state)))
+    conditions = (tension, reference_temperature)
+    # every state missing from the cache is solved in one vectorized call
+    solved = sag_cache.get_many([state + conditions for state in unique],
+                                lambda keys: solve_states([key[:3] for key in keys], *conditions))
+    values = np.array(solved).reshape(-1, 2)[inverse.ravel()].reshape(conductor_type.shape + (2,))
+    return values[..., 0], values[..., 1]
+
+
+def effective_coordinates(coordinates, sags):
+    # phase positions at the average height over the span, y - 2/3 sag of a parabola, sags (N,) or (N, P)
+    coordinates = np.array(coordinates, dtype=float)
+    sags = np.asarray(sags, dtype=float)
+    coordinates[..., 1] -= 2 / 3 * (sags[..., None] if sags.ndim == 1 else sags)
+    return coordinates
+
+
+def sagged_parameters(tower_type, num_circuits, coordinates, num_conductors, conductor_type, distance_between_conductors,
+                      length, span, temperature, tension=everyday_tension):
+    # calculate_parameters_batch with sag: coordinates are attachment heights checked against the tower,
+    # L and C use the effective heights, plus sag, tension (% RTS) and ground clearance margin columns
+    # (the earth-free model only sees the heights through their differences, tl_matrix and tl_fields see them all)
+    coordinates = np.asarray(coordinates, dtype=float)
+    n_rows = coordinates.shape[0]
+    column = lambda v, dtype=None: np.broadcast_to(np.asarray(v, dtype=dtype), (n_rows,))
+    tower_type, conductor_type = column(tower_type), column(conductor_type)
+    num_circuits, num_conductors = column(num_circuits, int), column(num_conductors, int)
+    spacing, length = column(distance_between_conductors, float), column(length, float)
+    span, temperature = column(span, float), column(temperature, float)
+
+    error = design_errors(tower_type, num_circuits, coordinates, num_conductors, conductor_type, spacing)
+    error[(error == ERR_OK) & ~(span > 0)] = ERR_SPAN
+    ok = error == ERR_OK
+    R, L, C, capacity, D, H, margin = (np.full(n_rows, np.nan) for _ in range(7))
+    if ok.any():
+        D[ok], H[ok] = sag(conductor_type[ok], span[ok], temperature[ok], tension)
+        voltage = lookup(tower_type[ok], towers, "voltage")
+        R[ok], L[ok], C[ok], capacity[ok] = line_constants(
+            effective_coordinates(coordinates[ok], D[ok]), num_circuits[ok], num_conductors[ok], spacing[ok],
+            lookup(conductor_type[ok], conductors, "GMR"), lookup(conductor_type[ok], conductors, "diameter"),
+            lookup(conductor_type[ok], conductors, "R"), lookup(conductor_type[ok], conductors, "I"), voltage)
+        used = np.arange(coordinates.shape[1]) < 3 * num_circuits[ok, None]
+        lowest = np.where(used, coordinates[ok, :, 1], np.inf).min(axis=1)
+        margin[ok] = lowest - D[ok] - min_clearance(voltage)
+
+    return {
+        "R (Ω)": R * length,
+        "L (mH)": L * length,
+        "C (µF)": C * length,
+        "Capacity (MVA)": capacity,
+        "Sag (m)": D,
+        "Tension (% RTS)": 100 * H / (lookup(conductor_type, conductors, "rts") * 1e3),
+        "Clearance margin (m)": margin,
+        "Clearance": margin >= 0,  # False for invalid designs
+        "error": error,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sag, tension and ground clearance of a span at several temperatures")
+    parser.add_argument("conductor_type", choices=list(conductors))
+    parser.add_argument("--span", type=float, nargs="+", default=[300.0], help="span lengths (m)")
+    parser.add_argument("--temperature", type=float, nargs="+", default=[-5.0, 15.0, 50.0, 75.0], help="conductor temperatures (°C)")
+    parser.add_argument("--tension", type=float, default=everyday_tension, help="stringing tension as a fraction of RTS")
+    parser.add_argument("--tower", choices=list(towers), help="check the clearance of the tower's lowest allowed attachment")
+    args = parser.parse_args(argv)
+
+    span, temperature = np.meshgrid(args.span, args.temperature, indexing="ij")
+    try:
+        D, H = sag(args.conductor_type, span, temperature, args.tension)
+    except ValueError as e:
+        parser.error(str(e))
+    rts = conductors[args.conductor_type]["rts"] * 1e3
+    if args.tower:
+        tower = towers[args.tower]
+        required = min_clearance(tower["voltage"])
+        print(f"{args.tower}: lowest attachment {tower['min_height']} m, required ground clearance {required:.2f} m")
+    print(f"{'span (m)':>10}{'T (°C)':>9}{'sag (m)':>10}{'tension (kN)':>14}{'% RTS':>8}" + (f"{'clearance (m)':>15}" if args.tower else ""))
+    for s, t, d, h in zip(span.ravel(), temperature.ravel(), D.ravel(), H.ravel()):
+        line = f"{s:10g}{t:9g}{d:10.3f}{h / 1e3:14.2f}{100 * h / rts:8.1f}"
+        if args.tower:
+            margin = tower["min_height"] - d - required
+            line += f"{margin:15.2f}" + ("" if margin >= 0 else "  violated")
+        print(line)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
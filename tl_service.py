@@ -0,0 +1,372 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import tl_batch
+import tl_bundle
+from tl_specs import conductors, towers
+from tl_batch import ERR_CIRCUITS, ERR_OK, calculate_parameters_batch, error_message
+from tl_cache import design_key
+
+
+result_keys = ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)")
+default_port = 8374
+default_store = "tl_results.sqlite"
+statuses = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 405: "405 Method Not Allowed",
+            500: "500 Internal Server Error"}
+
+
+def parse_design(obj):
+    # JSON design object -> (design_key, length), raises ValueError for malformed input
+    try:
+        coordinates = [(float(x), float(y)) for x, y in obj["coordinates"]]
+        key = design_key(str(obj["tower_type"]), obj["num_circuits"], coordinates, obj["num_conductors"],
+                         str(obj["conductor_type"]), float(obj["distance_between_conductors"]))
+        return key, float(obj["length"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid design: {type(e).__name__} {e}")
+
+
+def engine_digest():
+    # the catalog in use (TL_CATALOG included) and the source of the batch engine, stored results of
+    # another catalog or engine never match
+    digest = hashlib.sha1()
+    for table in (conductors, towers):
+        digest.update(str(table.data.dtype).encode())
+        digest.update(table.data.tobytes())
+    for module in (tl_batch, tl_bundle):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+engine = engine_digest()
+
+
+def design_hash(key):
+    return hashlib.sha1(json.dumps([engine, key]).encode()).hexdigest()
+
+
+def evaluate_per_km(keys):
+    # per km (R, L, C, capacity, error code) of design keys, runs in the worker processes,
+    # designs with the same number of phases are evaluated in one batch
+    rows = [(np.nan, np.nan, np.nan, np.nan, ERR_CIRCUITS)] * len(keys)
+    for num_phases in (3, 6):
+        index = [i for i, key in enumerate(keys) if len(key[2]) == num_phases]
+        if not index:
+            continue
+        columns = list(zip(*(keys[i] for i in index)))
+        tower_type, num_circuits, points, num_conductors, spacing, conductor_type = columns
+        result = calculate_parameters_batch(np.array(tower_type), np.array(num_circuits), np.array(points, dtype=float),
+                                            np.array(num_conductors), np.array(conductor_type), np.array(spacing), 1.0)
+        values = zip(*(result[name].tolist() for name in result_keys + ("error",)))
+        for i, value in zip(index, values):
+            rows[i] = value
+    return rows
+
+
+class ResultStore:
+    # per km results keyed by design hash in SQLite, so a design is never computed twice across restarts.
+    # The service only calls it from one dedicated thread (Batcher.io), never from the event loop.
+    def __init__(self, path=default_store):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (hash TEXT PRIMARY KEY, r REAL, l REAL, c REAL, capacity REAL, error INTEGER)")
+        self.db.commit()
+
+    def get_many(self, hashes, chunk_size=500):
+        found = {}
+        for start in range(0, len(hashes), chunk_size):
+            part = hashes[start:start + chunk_size]
+            query = f"SELECT hash, r, l, c, capacity, error FROM results WHERE hash IN ({','.join('?' * len(part))})"
+            for digest, *row in self.db.execute(query, part):
+                found[digest] = tuple(np.nan if v is None else v for v in row)
+        return found
+
+    def put_many(self, rows):
+        self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                            [(digest, *(None if v != v else v for v in row)) for digest, row in rows])
+        self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+class Batcher:
+    # Coalesces the designs of concurrent requests: the first design starts a short window, every design
+    # arriving within it (up to max_batch) goes to the store and then, for the misses, to one vectorized
+    # call on the process pool.
+    def __init__(self, store, pool, window=0.002, max_batch=4096):
+        self.store = store
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = []
+        self.timer = None
+        self.tasks = set()
+        self.io = ThreadPoolExecutor(1, thread_name_prefix="tl-store")  # every SQLite call, in order
+        self.stats = {"batches": 0, "designs": 0, "store_hits": 0, "computed": 0}
+
+    async def submit(self, key):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.append((key, design_hash(key), future))
+        if len(self.queue) >= self.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.queue = self.queue, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self.run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run(self, batch):
+        try:
+            loop = asyncio.get_running_loop()
+            keys = {digest: key for key, digest, _ in batch}
+            found = await loop.run_in_executor(self.io, self.store.get_many, list(keys))
+            missing = [digest for digest in keys if digest not in found]
+            if missing:
+                rows = await loop.run_in_executor(self.pool, evaluate_per_km, [keys[d] for d in missing])
+                computed = list(zip(missing, rows))
+                found.update(computed)
+                # answer now, the write goes on in the store thread
+                loop.run_in_executor(self.io, self.store.put_many, computed)
+            for _, digest, future in batch:
+                if not future.done():
+                    future.set_result(found[digest])
+            self.stats["batches"] += 1
+            self.stats["designs"] += len(batch)
+            self.stats["store_hits"] += len(keys) - len(missing)
+            self.stats["computed"] += len(missing)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+def format_result(key, length, row):
+    # result dict like TransmissionLine.calculate_parameters, errors as {"error": message}
+    *values, error = row
+    if error == ERR_OK:
+        R, L, C, capacity = values
+        finite = lambda v: v if math.isfinite(v) else None  # JSON has no NaN or Infinity
+        return {"R (Ω)": finite(R * length), "L (mH)": finite(L * length), "C (µF)": finite(C * length), "Capacity (MVA)": finite(capacity)}
+    return {"error": error_message(int(error), key)}
+
+
+def percentiles(latencies):
+    if not latencies:
+        return {"p50 (ms)": None, "p99 (ms)": None}
+    p50, p99 = np.percentile(np.array(latencies) * 1e3, [50, 99])
+    return {"p50 (ms)": round(float(p50), 3), "p99 (ms)": round(float(p99), 3)}
+
+
+class Service:
+    # HTTP/1.1 JSON front end with keep-alive:
+    #   POST /calculate  a design object or a list of them -> result dict or list of result dicts
+    #   GET /stats       request, batching, store and latency counters
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.latencies = deque(maxlen=100000)
+        self.requests = 0
+        self.started = time.perf_counter()
+
+    async def calculate(self, body):
+        payload = json.loads(body)
+        designs = payload if isinstance(payload, list) else [payload]
+        parsed = [parse_design(design) for design in designs]
+        rows = await asyncio.gather(*(self.batcher.submit(key) for key, _ in parsed))
+        results = [format_result(key, length, row) for (key, length), row in zip(parsed, rows)]
+        return results if isinstance(payload, list) else results[0]
+
+    async def stats(self):
+        elapsed = time.perf_counter() - self.started
+        size = await asyncio.get_running_loop().run_in_executor(self.batcher.io, len, self.batcher.store)
+        return {"requests": self.requests, "requests/s": self.requests / elapsed, "store size": size,
+                **self.batcher.stats, **percentiles(self.latencies)}
+
+    async def route(self, method, path, body):
+        if path == "/calculate":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            start = time.perf_counter()
+            try:
+                result = await self.calculate(body)
+            except ValueError as e:  # also json.JSONDecodeError
+                return 400, {"error": str(e)}
+            except Exception as e:  # a failed batch, the store or the worker pool
+                return 500, {"error": f"{type(e).__name__}: {e}"}
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - start)
+            return 200, result
+        if path == "/stats":
+            return 200, await self.stats()
+        return 404, {"error": f"Unknown path {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.route(method, path, body)
+                data = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode()
+                writer.write(f"HTTP/1.1 {statuses[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=default_port, unix=None, store_path=default_store, window=0.002, max_batch=4096, workers=None):
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as pool:
+        # start the workers (and their numpy import) before the first request
+        await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(pool, evaluate_per_km, []) for _ in range(workers)))
+        store = ResultStore(store_path)
+        batcher = Batcher(store, pool, window, max_batch)
+        service = Service(batcher)
+        if unix:
+            server = await asyncio.start_unix_server(service.handle, unix)
+        else:
+            server = await asyncio.start_server(service.handle, host, port)
+        print(f"serving on {unix or f'http://{host}:{port}'}, {len(store)} stored results", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.io.shutdown(wait=True)  # pending writes
+            store.close()
+
+
+def sample_designs(count, seed=0):
+    # random valid designs around the benchmark layouts for the load generator
+    from tl_bench import layouts
+    from tl_specs import conductor_specs, tower_types
+    rng = np.random.default_rng(seed)
+    towers = list(layouts)
+    designs = []
+    for _ in range(count):
+        tower_type = towers[rng.integers(len(towers))]
+        base = np.array(layouts[tower_type])
+        designs.append({
+            "tower_type": tower_type, "num_circuits": len(base) // 3,
+            "coordinates": (base + rng.uniform(-0.5, 0.5, base.shape)).round(2).tolist(),
+            "num_conductors": int(rng.integers(1, tower_types[tower_type]["max_bundle"] + 1)),
+            "conductor_type": str(rng.choice(list(conductor_specs))),
+            "distance_between_conductors": 0.4, "length": float(rng.integers(10, 300)),
+        })
+    return designs
+
+
+async def request(reader, writer, method, path, body=b""):
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return json.loads(await reader.readexactly(length))
+
+
+async def load(host="127.0.0.1", port=default_port, unix=None, requests=5000, concurrency=64, unique=1000, seed=0):
+    # concurrent keep-alive clients posting single designs drawn from `unique` distinct ones
+    designs = [json.dumps(d).encode() for d in sample_designs(unique, seed)]
+    order = np.random.default_rng(seed + 1).integers(unique, size=requests)
+    latencies = []
+
+    async def connect():
+        return await (asyncio.open_unix_connection(unix) if unix else asyncio.open_connection(host, port))
+
+    async def client(picks):
+        reader, writer = await connect()
+        for i in picks:
+            start = time.perf_counter()
+            await request(reader, writer, "POST", "/calculate", designs[i])
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(order[k::concurrency]) for k in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    reader, writer = await connect()
+    stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+    return {"requests": requests, "concurrency": concurrency, "seconds": elapsed, "requests/s": requests / elapsed,
+            **percentiles(latencies), "server": stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON calculation service with micro-batching and a result store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("serve", "run the service"), ("load", "load test a running service")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=default_port)
+        command.add_argument("--unix", help="Unix socket path instead of TCP")
+    serve_command, load_command = commands.choices["serve"], commands.choices["load"]
+    serve_command.add_argument("--store", default=default_store, help="SQLite result store")
+    serve_command.add_argument("--window-ms", type=float, default=2.0, help="micro-batching window")
+    serve_command.add_argument("--max-batch", type=int, default=4096)
+    serve_command.add_argument("--workers", type=int, default=None)
+    load_command.add_argument("--requests", type=int, default=5000)
+    load_command.add_argument("--concurrency", type=int, default=64)
+    load_command.add_argument("--unique", type=int, default=1000, help="distinct designs among the requests")
+    load_command.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.unix, args.store, args.window_ms / 1e3, args.max_batch, args.workers or os.cpu_count()))
+        except KeyboardInterrupt:
+            pass
+    else:
+        report = asyncio.run(load(args.host, args.port, args.unix, args.requests, args.concurrency, args.unique, args.seed))
+        server = report.pop("server")
+        print(f"{report['requests']} requests with {report['concurrency']} clients in {report['seconds']:.2f} s: "
+              f"{report['requests/s']:.0f} requests/s, p50 {report['p50 (ms)']} ms, p99 {report['p99 (ms)']} ms")
+        print(f"server: {server['batches']} batches of {server['designs'] / max(server['batches'], 1):.1f} designs, "
+              f"{server['store_hits']} store hits, {server['computed']} computed, p50 {server['p50 (ms)']} ms, p99 {server['p99 (ms)']} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
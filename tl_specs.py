@@ -0,0 +1,15 @@
+import math
+
+from tl_catalog import load
+
+
+mu0 = 4*math.pi*1e-7
+eps0 = 8.85419e-12
+
+# Conductor types and tower types from the catalog (tl_catalog.json), as array-backed tables
+# for vectorized lookups and as the {name: {field: value}} spec dicts
+catalog = load()
+conductors = catalog["conductors"]
+towers = catalog["towers"]
+conductor_specs = conductors.to_dicts()
+tower_types = towers.to_dicts()
@@ -0,0 +1,195 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tl_specs import conductor_specs, conductors, tower_types
+from tl_batch import calculate_parameters_batch
+from tl_constraints import phase_ranges, tower_circuits
+from tl_corona import corona_batch
+from tl_resistance import skin_factor
+from tl_results import open_writer, records, result_dtype
+from tl_rating import reference_temperature, resistance_coefficient
+import tl_profile
+from tl_profile import stage
+
+
+result_keys = ("R (Ω)", "L (mH)", "C (µF)", "Capacity (MVA)")
+corona_keys = ("Max gradient (kV/cm)", "Corona loss (kW/km)")
+compact_extensions = (".results", ".parquet", ".pq")  # outputs written as tl_results columns instead of CSV
+
+
+def grid(lo, hi, step):
+    # closed interval [lo, hi] with roughly `step` metres between points
+    return np.linspace(lo, hi, max(2, int(round((hi - lo) / step)) + 1))
+
+
+def phase_positions(tower_type, step):
+    # list with one (K, 2) array of allowed x, y points per phase slot of the tower
+    positions = []
+    for x_ranges, (y_lo, y_hi) in phase_ranges(tower_type):
+        xs = np.concatenate([grid(lo, hi, step) for lo, hi in x_ranges])
+        positions.append(np.array(np.meshgrid(xs, grid(y_lo, y_hi, step), indexing="ij")).reshape(2, -1).T)
+    return positions
+
+
+def sweep_shape(tower_type, step, conductors, bundles):
+    return (len(conductors), len(bundles)) + tuple(len(p) for p in phase_positions(tower_type, step))
+
+
+def evaluate_chunk(tower_type, step, conductors, bundles, spacing, length, min_spacing, start, stop, corona=None, temperature=None):
+    # rebuild designs [start, stop) of the flattened sweep space and evaluate them in one batch,
+    # corona="report" adds the surface gradient columns, corona="reject" also drops corona violating designs,
+    # a conductor temperature (°C) turns R into the 50 Hz AC resistance at that temperature
+    with stage("sweep.enumerate", stop - start):
+        positions = phase_positions(tower_type, step)
+        shape = (len(conductors), len(bundles)) + tuple(len(p) for p in positions)
+        index = np.unravel_index(np.arange(start, stop), shape)
+        coordinates = np.stack([p[i] for p, i in zip(positions, index[2:])], axis=1)
+
+        # drop layouts where two phases touch
+        diff = coordinates[:, :, None, :] - coordinates[:, None, :, :]
+        dist = np.sqrt((diff**2).sum(axis=-1))
+        dist[:, np.arange(len(positions)), np.arange(len(positions))] = np.inf
+        keep = dist.min(axis=(1, 2)) > min_spacing
+
+    conductor = np.asarray(conductors)[index[0][keep]]
+    bundle = np.asarray(bundles)[index[1][keep]]
+    coordinates = coordinates[keep]
+    if corona:
+        with stage("sweep.corona", len(coordinates)):
+            checks = corona_batch(tower_type, tower_circuits[tower_type], coordinates, bundle, conductor, spacing)
+        if corona == "reject":
+            keep = ~checks["Corona"]
+            conductor, bundle, coordinates = conductor[keep], bundle[keep], coordinates[keep]
+            checks = {key: value[keep] for key, value in checks.items()}
+    result = calculate_parameters_batch(tower_type, tower_circuits[tower_type], coordinates, bundle, conductor, spacing, length)
+    if temperature is not None:
+        # R is linear in the conductor resistance
+        result["R (Ω)"] *= (1 + resistance_coefficient * (temperature - reference_temperature)) * skin_factor(conductor, temperature)
+    if corona:
+        result["Max gradient (kV/cm)"] = checks["Max gradient (kV/cm)"].max(axis=1)
+        result["Corona loss (kW/km)"] = checks["Corona loss (kW/km)"]
+    return conductor, bundle, coordinates, result
+
+
+def evaluate_profiled(*args):
+    # evaluate_chunk in a worker process with stage timing, the parent merges the returned totals
+    tl_profile.reset()
+    tl_profile.enable()
+    return evaluate_chunk(*args), tl_profile.snapshot()
+
+
+def run_sweep(tower_type, output, step=0.5, spacing=0.4, length=1.0, conductors=None, min_spacing=0.0, chunk_size=100000, workers=None, cancelled=None,
+              corona=None, temperature=None, mp_context=None):
+    # cancelled: optional callable polled between chunks, the sweep stops early once it returns True
+    # mp_context: multiprocessing context of the worker pool, "spawn" when called from a thread
+    # corona: None, "report" or "reject", temperature: None or °C, see evaluate_chunk
+    # output: CSV, or compact columns for a .results directory or .parquet file (see tl_results)
+    conductors = list(conductors or conductor_specs)
+    bundles = list(range(1, tower_types[tower_type]["max_bundle"] + 1))
+    total = int(np.prod(sweep_shape(tower_type, step, conductors, bundles)))
+    num_phases = 3 * tower_circuits[tower_type]
+    workers = workers or os.cpu_count()
+    args = (tower_type, step, conductors, bundles, spacing, length, min_spacing)
+
+    header = ["tower_type", "num_circuits", "conductor_type", "num_conductors"]
+    header += [f"{axis}{i+1}" for i in range(num_phases) for axis in "xy"]
+    header += list(result_keys) + (list(corona_keys) if corona else [])
+    extra = corona_keys if corona else ()
+    compact = output.lower().endswith(compact_extensions)
+
+    # with the collector on, workers send their stage totals back with every chunk
+    profiled = tl_profile.enabled
+    task = evaluate_profiled if profiled else evaluate_chunk
+
+    def write(future):
+        chunk = future.result()
+        if profiled:
+            chunk, stats = chunk
+            tl_profile.merge(stats)
+        with stage("sweep.write", len(chunk[0])):
+            if compact:
+                return write_records(sink, tower_type, chunk, extra)
+            return write_chunk(writer, tower_type, chunk)
+
+    written = 0
+    start_time = time.perf_counter()
+    if compact:
+        sink = open_writer(output, result_dtype(num_phases, extra))
+    else:
+        sink = open(output, "w", newline="", encoding="utf-8")
+        writer = csv.writer(sink)
+        writer.writerow(header)
+    try:
+        with ProcessPoolExecutor(workers, mp_context=mp_context) as pool:
+            # keep only a few chunks in flight so memory stays flat however large the sweep is
+            pending = deque()
+            for start in range(0, total, chunk_size):
+                if cancelled is not None and cancelled():
+                    break
+                pending.append(pool.submit(task, *args, start, min(start + chunk_size, total), corona, temperature))
+                if len(pending) < 2 * workers:
+                    continue
+                written += write(pending.popleft())
+            while pending:
+                if cancelled is not None and cancelled():
+                    for future in pending:
+                        future.cancel()
+                    break
+                written += write(pending.popleft())
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"{total} designs enumerated, {written} written to {sink.path if compact else output} in {elapsed:.1f} s")
+    return written
+
+
+def write_chunk(writer, tower_type, chunk):
+    conductor, bundle, coordinates, result = chunk
+    columns = [np.full(len(conductor), tower_type), np.full(len(conductor), tower_circuits[tower_type]), conductor, bundle]
+    columns += list(coordinates.reshape(len(conductor), 2 * coordinates.shape[1]).T)
+    columns += [result[key] for key in result_keys + corona_keys if key in result]
+    writer.writerows(zip(*columns))
+    return len(conductor)
+
+
+def write_records(sink, tower_type, chunk, extra=()):
+    # the chunk as compact records, no per row Python objects
+    conductor, bundle, coordinates, result = chunk
+    sink.write(records(tower_type, tower_circuits[tower_type], coordinates, bundle, conductor, result, extra))
+    return len(conductor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep every allowed phase placement of a tower type")
+    parser.add_argument("tower_type", choices=list(tower_types))
+    parser.add_argument("-o", "--output", default="sweep.csv", help="CSV, or a .results directory or .parquet file of compact columns")
+    parser.add_argument("--step", type=float, default=0.5, help="grid step of phase coordinates (m)")
+    parser.add_argument("--spacing", type=float, default=0.4, help="distance between conductors in the bundle (m)")
+    parser.add_argument("--length", type=float, default=1.0, help="line length (km)")
+    parser.add_argument("--conductor", action="append", choices=list(conductor_specs), help="limit to these conductors")
+    parser.add_argument("--where", action="append", default=[], help='limit to catalog conductors matching a condition such as "R<0.07"')
+    parser.add_argument("--min-spacing", type=float, default=0.0, help="skip layouts with phases closer than this (m)")
+    parser.add_argument("--chunk", type=int, default=100000, help="designs per worker task")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--corona", choices=["report", "reject"], help="add surface gradient columns, or also drop corona violating designs")
+    parser.add_argument("--temperature", type=float, help="report the 50 Hz AC resistance at this conductor temperature (°C)")
+    args = parser.parse_args(argv)
+    if args.where:
+        selected = conductors.query(*args.where)["name"].tolist()
+        args.conductor = [name for name in selected if name in (args.conductor or selected)]
+        if not args.conductor:
+            parser.error("no conductor matches the conditions")
+    run_sweep(args.tower_type, args.output, args.step, args.spacing, args.length, args.conductor,
+              args.min_spacing, args.chunk, args.workers, corona=args.corona, temperature=args.temperature)
+
+
+if __name__ == "__main__":
+    sys.exit(main())